@@ -63,8 +63,8 @@ async def get_dicom_slice(
             reader.SetFileName(tmp_path)
             image = reader.Execute()
             
-            # NumPy 배열로 변환
-            image_array = sitk.GetArrayFromImage(image)
+            # NumPy 배열로 변환 (슬라이스 추출/윈도잉은 읽기만 하므로 복사 없는 뷰, image는 이 블록 동안 유지)
+            image_array = sitk.GetArrayViewFromImage(image)
             
             # 2D 슬라이스 추출 (SimpleITK는 (z, y, x) 순서)
             if len(image_array.shape) == 3:
@@ -33,6 +33,10 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool = False
     MINIO_BUCKET_NAME: str = "mri-data"
     
+    # Worker volume cache (재시도 시 DICOM 재다운로드/디코딩 생략)
+    VOLUME_CACHE_DIR: str = "/tmp/mri_cache"
+    VOLUME_CACHE_MAX_ENTRIES: int = 8
+    
     # API
     BACKEND_URL: str = "http://localhost:8001"
     FRONTEND_URL: str = "http://localhost:5173"
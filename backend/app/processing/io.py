@@ -47,10 +47,8 @@ def load_series_by_files(files: List[str]) -> sitk.Image:
     r = sitk.ImageSeriesReader()
     r.SetFileNames(files)
     
-    # 가이드: DICOM 메타데이터 보존 설정
-    r.MetaDataDictionaryArrayUpdateOn()
-    r.LoadPrivateTagsOn()
-    
+    # 슬라이스별 메타데이터 딕셔너리/사설 태그는 읽지 않음 (헤더는 호출 전에 pydicom으로 이미 파싱,
+    # 방향/원점/간격은 메타데이터 딕셔너리와 무관하게 이미지에 보존됨)
     img = r.Execute()  # 방향/원점/간격 보존
     
     # 메타데이터 확인
@@ -8,10 +8,276 @@ from skimage import measure
 import trimesh
 from pathlib import Path
 from scipy.ndimage import distance_transform_edt as edt, gaussian_filter
+import json
+import struct
 import logging
+import os
+
+try:
+    import open3d as o3d
+except ImportError:  # 선택적 의존성: 없으면 trimesh 래퍼로 폴백
+    o3d = None
+
+try:
+    import torch
+    from pytorch3d.ops.marching_cubes import marching_cubes as p3d_marching_cubes
+except ImportError:  # 선택적 의존성: GPU 마칭큐브 (없으면 skimage CPU 경로)
+    torch = None
+    p3d_marching_cubes = None
+
+try:
+    from vtkmodules.vtkCommonCore import vtkSMPTools
+    from vtkmodules.vtkCommonDataModel import vtkImageData
+    from vtkmodules.vtkFiltersCore import vtkFlyingEdges3D
+    from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+    # pip 배포 VTK의 기본 SMP 백엔드는 Sequential → STDThread로 바꿔
+    # Flying Edges가 볼륨을 행 블록 단위로 나눠 멀티스레드로 처리하도록 함 (결과는 동일)
+    vtkSMPTools.SetBackend('STDThread')
+except ImportError:  # 선택적 의존성: Flying Edges (없으면 skimage 마칭큐브)
+    vtkFlyingEdges3D = None
+
+try:
+    import DracoPy
+except ImportError:  # 선택적 의존성: 인프로세스 Draco 인코더 (없으면 gltf-transform CLI 사용)
+    DracoPy = None
+
+# 다른 모듈이 DracoPy를 직접 임포트하지 않고 인프로세스 Draco 사용 가능 여부만 확인하도록 공개
+HAS_DRACOPY = DracoPy is not None
 
 logger = logging.getLogger(__name__)
 
+# Draco/업로드 전 메쉬 면 수 상한: 업로드 바이트와 브라우저 파싱 비용은 Draco 압축률보다 면 수에 비례
+MESH_TARGET_FACES = int(os.getenv("MESH_TARGET_FACES", "150000"))
+
+# glTF 상수
+_GLB_MAGIC = 0x46546C67  # 'glTF'
+_GLB_CHUNK_JSON = 0x4E4F534A
+_GLB_CHUNK_BIN = 0x004E4942
+_GL_BYTE = 5120
+_GL_UNSIGNED_SHORT = 5123
+_GL_UNSIGNED_INT = 5125
+_GL_FLOAT = 5126
+
+# 바이너리 STL 삼각형 레코드 (법선 12B + 정점 36B + 속성 2B = 50B, 패딩 없음)
+_STL_RECORD = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+_GL_ARRAY_BUFFER = 34962
+_GL_ELEMENT_ARRAY_BUFFER = 34963
+
+
+def simplify_mesh(mesh: trimesh.Trimesh, target_faces: int) -> trimesh.Trimesh:
+    """
+    Quadric 간소화
+    open3d(C++/OpenMP)를 직접 호출하여 trimesh 래퍼의 재처리 오버헤드를 피함
+    open3d가 없으면 trimesh.simplify_quadratic_decimation으로 폴백
+    """
+    if o3d is None:
+        return mesh.simplify_quadratic_decimation(target_faces)
+    
+    # open3d는 정점이 공유된 메쉬에서만 올바르게 간소화됨 (호출자 메쉬는 건드리지 않도록 사본에서 병합)
+    merged = mesh.copy()
+    merged.merge_vertices()
+    m = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(np.asarray(merged.vertices, dtype=np.float64)),
+        o3d.utility.Vector3iVector(np.asarray(merged.faces, dtype=np.int32))
+    )
+    m = m.simplify_quadric_decimation(target_number_of_triangles=int(target_faces))
+    return trimesh.Trimesh(vertices=np.asarray(m.vertices), faces=np.asarray(m.triangles), process=False)
+
+
+def smooth_and_simplify(mesh: trimesh.Trimesh, iterations: int = 5, target_faces: int = None,
+                        lamb: float = 0.5, nu: float = -0.53) -> trimesh.Trimesh:
+    """
+    Taubin(λ/μ) 스무딩 + (선택) Quadric 간소화
+    open3d가 있으면 C++ 메쉬 하나로 두 단계를 처리하고 trimesh로는 마지막에 한 번만 변환
+    open3d가 없으면 trimesh.smoothing.filter_taubin + simplify_mesh로 폴백
+    """
+    if o3d is None:
+        # trimesh 규약은 open3d와 다름: 홀수 단계에서 vertices -= nu * Δ이므로 양수 nu를 받고,
+        # λ/μ 한 단계를 1회로 세므로 open3d의 1회(λ+μ 한 쌍)와 맞추려면 2배 (음수 nu면 매 단계 수축)
+        trimesh.smoothing.filter_taubin(mesh, lamb=lamb, nu=abs(nu), iterations=2 * iterations)
+        return simplify_mesh(mesh, target_faces) if target_faces else mesh
+    
+    # open3d 스무딩/간소화는 정점이 공유된 메쉬에서만 올바르게 동작 (호출자 메쉬는 사본에서 병합)
+    merged = mesh.copy()
+    merged.merge_vertices()
+    m = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(np.asarray(merged.vertices, dtype=np.float64)),
+        o3d.utility.Vector3iVector(np.asarray(merged.faces, dtype=np.int32))
+    )
+    m = m.filter_smooth_taubin(number_of_iterations=iterations, lambda_filter=lamb, mu=nu)
+    if target_faces:
+        m = m.simplify_quadric_decimation(target_number_of_triangles=int(target_faces))
+    return trimesh.Trimesh(vertices=np.asarray(m.vertices), faces=np.asarray(m.triangles), process=False)
+
+
+def largest_component(mesh: trimesh.Trimesh, prefer_volume: bool = True) -> tuple:
+    """
+    가장 큰 연결요소만 남김 (mesh.split()처럼 컴포넌트마다 Trimesh를 만들지 않음)
+    면 인접 그래프 라벨링 1회 + bincount로 컴포넌트별 면 수/부호 체적을 한 번에 계산
+    prefer_volume: 닫힌(모든 에지를 면 2개가 공유) 양의 체적 컴포넌트가 있으면 체적 최대, 없으면 면 수 최대
+    
+    Returns:
+        (mesh, volume) - 면 수 기준으로 골랐으면 volume은 None
+    """
+    n_faces = len(mesh.faces)
+    labels = trimesh.graph.connected_component_labels(mesh.face_adjacency, node_count=n_faces)
+    n_comps = int(labels.max()) + 1 if n_faces else 0
+    
+    volume = None
+    winner = None
+    if prefer_volume and n_comps > 0:
+        # 컴포넌트별 부호 체적: 면마다 원점 기준 사면체 체적 (v0 · (v1 × v2)) / 6
+        tri = mesh.triangles
+        face_vol = np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])) / 6.0
+        comp_vol = np.bincount(labels, weights=face_vol, minlength=n_comps)
+        # 열린 에지(공유 면 수 ≠ 2)를 하나라도 가진 컴포넌트는 체적 후보에서 제외
+        edge_count = np.bincount(mesh.edges_unique_inverse)
+        open_edge = edge_count[mesh.edges_unique_inverse] != 2
+        comp_open = np.bincount(labels[mesh.edges_face], weights=open_edge, minlength=n_comps) > 0
+        candidates = np.flatnonzero(~comp_open & (comp_vol > 0))
+        if candidates.size:
+            winner = int(candidates[np.argmax(comp_vol[candidates])])
+            volume = float(comp_vol[winner])
+    
+    if winner is None:
+        if n_comps <= 1:
+            return mesh, volume
+        winner = int(np.argmax(np.bincount(labels, minlength=n_comps)))
+    if n_comps == 1:
+        return mesh, volume
+    
+    return mesh.submesh([np.flatnonzero(labels == winner)], append=True), volume
+
+
+def _marching_cubes_gpu(volume: np.ndarray, level: float, spacing_zyx) -> tuple:
+    """PyTorch3D CUDA 마칭큐브 (셀 단위 병렬), skimage와 같은 (z,y,x) 좌표/감기 방향으로 반환"""
+    # uint8/bool 그대로 업로드 후 GPU에서 float 변환 (PCIe 전송량 1/4)
+    vol = torch.from_numpy(np.ascontiguousarray(volume)).cuda().float().unsqueeze(0)
+    verts_list, faces_list = p3d_marching_cubes(vol, isolevel=float(level), return_local_coords=False)
+    verts, faces = verts_list[0], faces_list[0]
+    if verts.shape[0] == 0:
+        raise ValueError("No surface found at the given level")
+    
+    # 면마다 정점을 따로 내는 구현 대비 중복 정점 병합 (skimage 출력과 동일한 공유 정점 메쉬)
+    verts, inverse = torch.unique(verts, dim=0, return_inverse=True)
+    faces = inverse[faces]
+    
+    # PyTorch3D는 (x,y,z) 인덱스 좌표 → skimage와 같은 (z,y,x) + spacing 적용
+    scale = torch.tensor(spacing_zyx, dtype=verts.dtype, device=verts.device)
+    verts = verts[:, [2, 1, 0]] * scale
+    
+    verts = verts.cpu().numpy()
+    faces = faces.cpu().numpy().astype(np.int64)
+    
+    # 감기 방향을 skimage 규약(전경 내부 기준 (z,y,x) 부호 체적 < 0)에 맞춤
+    a, b, c = verts[faces[:, 0]], verts[faces[:, 1]], verts[faces[:, 2]]
+    if np.einsum('ij,ij->', a, np.cross(b, c)) > 0:
+        faces = faces[:, ::-1].copy()
+    
+    return verts, faces, None
+
+
+def _flying_edges_vtk(volume: np.ndarray, level: float, spacing_zyx) -> tuple:
+    """VTK Flying Edges 등치면 추출 (4-pass, 빈 행 건너뜀), skimage와 같은 (z,y,x) 좌표/감기 방향으로 반환"""
+    volume = np.ascontiguousarray(volume)
+    image = vtkImageData()
+    image.SetDimensions(*volume.shape[::-1])  # VTK는 (x,y,z), x가 가장 빠른 축 = C-order (z,y,x) 배열과 동일 메모리 배치
+    image.SetSpacing(*[float(s) for s in spacing_zyx[::-1]])
+    scalars = numpy_to_vtk(volume.ravel(), deep=False)  # 복사 없이 참조 (volume이 살아 있는 동안 유효)
+    image.GetPointData().SetScalars(scalars)
+    
+    fe = vtkFlyingEdges3D()
+    fe.SetInputData(image)
+    fe.SetValue(0, float(level))
+    fe.ComputeNormalsOn()
+    fe.ComputeGradientsOff()
+    fe.ComputeScalarsOff()
+    fe.Update()
+    output = fe.GetOutput()
+    
+    if output.GetNumberOfPoints() == 0:
+        raise ValueError("No surface found at the given level")
+    
+    verts = vtk_to_numpy(output.GetPoints().GetData())[:, ::-1].astype(np.float32)
+    faces = vtk_to_numpy(output.GetPolys().GetConnectivityArray()).reshape(-1, 3).astype(np.int64)
+    normals = vtk_to_numpy(output.GetPointData().GetNormals())[:, ::-1].astype(np.float32)
+    
+    # 감기 방향을 skimage 규약(전경 내부 기준 (z,y,x) 부호 체적 < 0)에 맞춤
+    # (x,y,z)→(z,y,x) 축 반전으로 감기 방향이 뒤집히므로 부호로 판정
+    a, b, c = verts[faces[:, 0]], verts[faces[:, 1]], verts[faces[:, 2]]
+    if np.einsum('ij,ij->', a, np.cross(b, c)) > 0:
+        faces = faces[:, ::-1].copy()
+    
+    return verts, faces, normals
+
+
+def _extract_isosurface_backend(volume: np.ndarray, level: float, spacing_zyx) -> tuple:
+    """GPU → Flying Edges → skimage 순으로 step 1 등치면 추출 (extract_isosurface 내부용)"""
+    if p3d_marching_cubes is not None and torch.cuda.is_available():
+        try:
+            return _marching_cubes_gpu(volume, level, spacing_zyx)
+        except Exception as e:
+            logger.warning(f"GPU marching cubes failed: {e}, falling back to CPU")
+    
+    if vtkFlyingEdges3D is not None:
+        try:
+            return _flying_edges_vtk(volume, level, spacing_zyx)
+        except Exception as e:
+            logger.warning(f"Flying edges failed: {e}, falling back to skimage")
+    
+    verts, faces, normals, _ = measure.marching_cubes(volume, level=level, spacing=spacing_zyx)
+    return verts, faces, normals
+
+
+def _surface_roi(volume: np.ndarray, level: float):
+    """
+    등치면이 지날 수 있는 영역의 (z,y,x) 슬라이스 튜플: level 초과 복셀의 바운딩박스 + 사방 1복셀
+    이 밖의 셀은 8개 꼭짓점이 모두 level 이하라 삼각형이 생기지 않으므로 잘라내도 결과가 같음
+    반환: 볼륨 전체와 같거나 level 초과 복셀이 없으면 None
+    """
+    above = volume > level
+    occupied_z = np.flatnonzero(above.any(axis=(1, 2)))
+    if occupied_z.size == 0:
+        return None
+    plane_yx = above[occupied_z[0]:occupied_z[-1] + 1].any(axis=0)
+    occupied_y = np.flatnonzero(plane_yx.any(axis=1))
+    occupied_x = np.flatnonzero(plane_yx.any(axis=0))
+    lo = np.maximum([occupied_z[0] - 1, occupied_y[0] - 1, occupied_x[0] - 1], 0)
+    hi = np.minimum([occupied_z[-1] + 2, occupied_y[-1] + 2, occupied_x[-1] + 2], volume.shape)
+    if (lo == 0).all() and (hi == volume.shape).all():
+        return None
+    return tuple(slice(int(a), int(b)) for a, b in zip(lo, hi))
+
+
+def extract_isosurface(volume: np.ndarray, level: float, spacing_zyx, step_size: int = 1) -> tuple:
+    """
+    등치면 추출 디스패처
+    우선순위: CUDA + PyTorch3D GPU 마칭큐브 → VTK Flying Edges → skimage 마칭큐브 (실패 시 다음 백엔드로 폴백)
+    step_size > 1은 skimage와 동일하게 격자를 건너뛰어 샘플링: 부분 샘플 볼륨 + spacing×step으로 바꿔
+    모든 백엔드를 step 1로 실행 (결과 동일, uint8 0/1 마스크는 float 변환 없이 중점 보간)
+    표면이 지날 수 있는 ROI(_surface_roi)만 잘라 추출하고 정점에 ROI 원점을 더함 (빈 배경 셀 스캔 생략)
+    
+    Returns:
+        (verts_zyx, faces, normals) - normals는 백엔드가 제공하지 않으면 None (trimesh가 계산)
+    """
+    if step_size > 1:
+        volume = volume[::step_size, ::step_size, ::step_size]
+        spacing_zyx = tuple(float(s) * step_size for s in spacing_zyx)
+        step_size = 1
+    
+    roi = _surface_roi(volume, level)
+    if roi is not None:
+        volume = volume[roi]
+    
+    # 부분 샘플/ROI/연속화/float32 축소를 한 번의 복사로 처리 (이미 C-연속 float32면 복사 없음)
+    # uint8/정수 마스크는 그대로 둠: GPU/VTK는 정수 입력을 직접 받고, skimage만 내부에서 float32로 변환
+    volume = np.ascontiguousarray(volume, dtype=np.float32 if volume.dtype.kind == 'f' else None)
+    
+    verts, faces, normals = _extract_isosurface_backend(volume, level, spacing_zyx)
+    if roi is not None:
+        verts = verts + np.array([r.start for r in roi], dtype=verts.dtype) * np.asarray(spacing_zyx, dtype=verts.dtype)
+    return verts, faces, normals
+
 
 def mesh_from_mask(mask: np.ndarray, spacing, logger=None):
     """
@@ -28,12 +294,12 @@ def mesh_from_mask(mask: np.ndarray, spacing, logger=None):
     Returns:
         (mesh, stats)
     """
-    a = mask.astype(np.float32)
-    if a.sum() < 2000:
+    # 전경 수는 원본 bool/uint8에서 세고, 블러는 float32 출력으로 바로 받음 (float32 마스크 사본 없음)
+    if np.count_nonzero(mask) < 2000:
         raise ValueError("Mask too small for mesh.")
     
-    a = gaussian_filter(a, sigma=0.6)
-    sdf = edt(a >= 0.5) - edt(a < 0.5)
+    a = gaussian_filter(mask, sigma=0.6, output=np.float32)
+    sdf = np.subtract(edt(a >= 0.5), edt(a < 0.5), dtype=np.float32)
     
     # spacing이 (x,y,z)면 (z,y,x)로 변환
     if len(spacing) == 3:
@@ -42,14 +308,13 @@ def mesh_from_mask(mask: np.ndarray, spacing, logger=None):
         spacing_zyx = spacing
     
     # step_size=1 강제 (피질 보존)
-    import os
     step = int(os.getenv("MC_STEP_SIZE", "1"))
     if step != 1:
         logger.warning(f"MC_STEP_SIZE={step} requested, but forcing step_size=1 for cortical preservation")
         step = 1
     
-    verts, faces, normals, _ = measure.marching_cubes(
-        sdf, level=0.0, spacing=spacing_zyx, step_size=step
+    verts, faces, normals = extract_isosurface(
+        sdf, level=0.0, spacing_zyx=spacing_zyx, step_size=step
     )
     
     # 좌표계 변환 (LPS -> Three.js)
@@ -75,7 +340,7 @@ def mesh_from_mask(mask: np.ndarray, spacing, logger=None):
     # 디시메이션은 얼굴수 과도할 때만 25% 축소
     try:
         if mesh.faces.shape[0] > 150_000:
-            mesh = mesh.simplify_quadratic_decimation(int(mesh.faces.shape[0]*0.75))
+            mesh = simplify_mesh(mesh, int(mesh.faces.shape[0]*0.75))
     except Exception:
         if logger:
             logger.info("Decimation skipped (no backend).")
@@ -98,7 +363,8 @@ def mask_to_mesh(mask_img: sitk.Image) -> trimesh.Trimesh:
     Returns:
         trimesh.Trimesh: 3D 메쉬
     """
-    a = sitk.GetArrayFromImage(mask_img).astype(np.uint8)
+    # 읽기 전용으로만 쓰므로 복사 없는 뷰 (mask_img가 함수 끝까지 살아 있음)
+    a = sitk.GetArrayViewFromImage(mask_img)
     
     if a.max() == 0:
         logger.warning("Empty mask, returning empty mesh")
@@ -111,23 +377,25 @@ def mask_to_mesh(mask_img: sitk.Image) -> trimesh.Trimesh:
         raise ValueError(f"Invalid spacing: {spacing}. Must be 3D spacing tuple.")
     
     # 안티앨리어싱: SDF 전에 이진 마스크에 가우시안 필터
-    a_f = gaussian_filter(a.astype(np.float32), sigma=0.8)
+    a_f = gaussian_filter(a, sigma=0.8, output=np.float32)  # uint8 입력 그대로, float32로 바로 출력
     a_binary = a_f > 0.5
     
     # 부호 거리장 계산: 내부는 +, 외부는 -
     # scipy.ndimage.distance_transform_edt는 (z, y, x) 순서
     sdf_pos = edt(a_binary, sampling=spacing[::-1])  # 내부 거리
     sdf_neg = edt(~a_binary, sampling=spacing[::-1])  # 외부 거리
-    sdf = sdf_pos - sdf_neg
+    # 등치면 추출 입력은 C-연속 float32 (float64 대비 메모리 대역폭 절반)
+    sdf = np.subtract(sdf_pos, sdf_neg, dtype=np.float32)
+    del sdf_pos, sdf_neg
     
     logger.info(f"SDF range: [{sdf.min():.3f}, {sdf.max():.3f}]")
     
     # SDF 0-등치면 추출 (level=0.0)
-    # step_size=2로 marching_cubes 자체에서 면수 감소 (의존성 없음)
+    # step_size=2로 격자를 건너뛰어 면수 감소, 추출은 GPU/Flying Edges/skimage 디스패처 사용
     level = 0.0
     try:
-        verts, faces, normals, _ = measure.marching_cubes(
-            sdf, level=level, spacing=spacing[::-1], step_size=2  # step_size로 면수 감소
+        verts, faces, normals = extract_isosurface(
+            sdf, level=level, spacing_zyx=spacing[::-1], step_size=2  # step_size로 면수 감소
         )
     except ValueError as e:
         if "Surface level must be within volume data range" in str(e):
@@ -135,8 +403,8 @@ def mask_to_mesh(mask_img: sitk.Image) -> trimesh.Trimesh:
             data_min, data_max = sdf.min(), sdf.max()
             level = (data_min + data_max) / 2.0
             logger.warning(f"Marching cubes failed with level 0.0, retrying with level {level}")
-            verts, faces, normals, _ = measure.marching_cubes(
-                sdf, level=level, spacing=spacing[::-1]
+            verts, faces, normals = extract_isosurface(
+                sdf, level=level, spacing_zyx=spacing[::-1]
             )
         else:
             raise
@@ -172,9 +440,8 @@ def mask_to_mesh(mask_img: sitk.Image) -> trimesh.Trimesh:
     mesh.remove_unreferenced_vertices()
     
     # 가장 큰 컴포넌트만 선택
-    comps = mesh.split(only_watertight=False)
-    if len(comps) > 0:
-        mesh = max(comps, key=lambda c: len(c.faces))
+    if len(mesh.faces) > 0:
+        mesh, _ = largest_component(mesh, prefer_volume=False)
         logger.info(f"Kept largest component: {len(mesh.faces)} faces")
     
     # Taubin smoothing → 블록/톱니 제거 (과스무딩 금지: 2회로 완화)
@@ -199,7 +466,7 @@ def mask_to_mesh(mask_img: sitk.Image) -> trimesh.Trimesh:
         target_faces = max(8000, int(mesh.faces.shape[0] * 0.7))  # 30%만 줄임
         logger.info(f"Simplifying mesh to {target_faces} faces (70% of original {len(mesh.faces)} faces)...")
         try:
-            mesh = mesh.simplify_quadratic_decimation(target_faces)
+            mesh = simplify_mesh(mesh, target_faces)
             logger.info(f"Final mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces (decimation: {original_faces} -> {len(mesh.faces)})")
         except Exception as e:
             logger.info(f"Mesh simplification skipped (may require open3d): {e}, using current mesh")
@@ -210,6 +477,26 @@ def mask_to_mesh(mask_img: sitk.Image) -> trimesh.Trimesh:
     return mesh
 
 
+def write_binary_stl(mesh: trimesh.Trimesh, file_obj) -> int:
+    """
+    바이너리 STL을 파일 객체에 직접 기록
+    50바이트 레코드를 NumPy 구조체 배열로 한 번에 채워 그대로 write (중간 bytes 사본 없음)
+    
+    Returns:
+        int: 기록한 바이트 수
+    """
+    records = np.empty(len(mesh.faces), dtype=_STL_RECORD)
+    records['normal'] = mesh.face_normals
+    # STL은 float32 → 정점을 먼저 float32로 줄이고 모음 (float64 (F,3,3) mesh.triangles 중간 배열 없음)
+    records['vertices'] = np.asarray(mesh.vertices, dtype=np.float32)[mesh.faces]
+    records['attr'] = 0
+    
+    file_obj.write(b'binary STL: mri-recon-portal'.ljust(80, b'\0'))
+    file_obj.write(struct.pack('<I', len(records)))
+    file_obj.write(records.view(np.uint8))
+    return 84 + records.nbytes
+
+
 def export_meshes(meshes: list, out_glb: Path, out_stl: Path) -> tuple:
     """
     여러 메쉬를 하나로 합쳐서 GLB/STL 내보내기
@@ -233,12 +520,180 @@ def export_meshes(meshes: list, out_glb: Path, out_stl: Path) -> tuple:
     out_glb.parent.mkdir(parents=True, exist_ok=True)
     out_stl.parent.mkdir(parents=True, exist_ok=True)
     
-    # GLB 내보내기
-    combo.export(str(out_glb))
+    # GLB 내보내기: Draco 압축 GLB를 한 번에 생성 (비압축 GLB 직렬화/재파싱 없음)
+    try:
+        out_glb.write_bytes(export_draco_glb(combo, position_bits=14))
+    except Exception as e:
+        logger.warning(f"Draco GLB export failed: {e}, using uncompressed GLB")
+        combo.export(str(out_glb))
     logger.info(f"Exported GLB: {out_glb}")
     
-    # STL 내보내기
-    combo.export(str(out_stl))
+    # STL 내보내기 (구조체 배열로 직접 기록)
+    with open(out_stl, 'wb') as f:
+        write_binary_stl(combo, f)
     logger.info(f"Exported STL: {out_stl}")
     
     return out_glb, out_stl
+
+
+def quantize_positions(vertices: np.ndarray, bits: int = 14, dtype=np.uint16) -> tuple:
+    """
+    정점 좌표를 bits 비트 정수 격자로 양자화
+    dtype: 격자 좌표 저장 타입 (Draco 인코더처럼 float 입력을 받는 쪽은 np.float32로 바로 받아 재변환 생략)
+    
+    Returns:
+        (q, offset, step): q는 (N, 3) dtype 정수 격자 값, 원래 좌표 ≈ q * step + offset
+        step은 세 축 모두 같은 값 (노드 scale이 비균일하면 three.js 법선 변환이 왜곡됨)
+    """
+    levels = (1 << bits) - 1
+    vmin = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - vmin).max())
+    # 가장 긴 축 기준 균일 격자, 모든 축이 평평하면(extent=0) 0 나눗셈 방지
+    step = np.full(3, extent / levels if extent > 0 else 1.0)
+    q = np.rint((vertices - vmin) / step).astype(dtype)
+    return q, vmin, step
+
+
+def _glb_container(gltf: dict, bin_blob: bytes) -> bytes:
+    """glTF JSON + BIN 청크를 GLB 컨테이너로 묶음 (4바이트 정렬)"""
+    json_bytes = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    json_bytes += b' ' * (-len(json_bytes) % 4)
+    bin_blob += b'\0' * (-len(bin_blob) % 4)
+    total = 12 + 8 + len(json_bytes) + 8 + len(bin_blob)
+    return b''.join([
+        struct.pack('<III', _GLB_MAGIC, 2, total),
+        struct.pack('<II', len(json_bytes), _GLB_CHUNK_JSON), json_bytes,
+        struct.pack('<II', len(bin_blob), _GLB_CHUNK_BIN), bin_blob,
+    ])
+
+
+def export_quantized_glb(mesh: trimesh.Trimesh, position_bits: int = 14) -> bytes:
+    """
+    KHR_mesh_quantization GLB 내보내기
+    - POSITION: uint16 (position_bits 비트 격자), scale/offset은 노드 TRS에 저장
+    - NORMAL: int8 normalized
+    Draco는 이미 정수인 좌표를 그대로 인코딩하고, 뷰어는 int16 속성을 그대로 GPU에 올림
+    
+    Args:
+        mesh: 내보낼 메쉬
+        position_bits: 위치 양자화 비트 수 (최대 16)
+        
+    Returns:
+        bytes: GLB 바이너리
+    """
+    q, offset, step = quantize_positions(np.asarray(mesh.vertices), bits=position_bits)
+    n_verts = len(q)
+    
+    # 정점 속성은 4바이트 정렬 필요 → uint16 VEC3는 stride 8, int8 VEC3는 stride 4로 패딩
+    pos = np.zeros((n_verts, 4), dtype=np.uint16)
+    pos[:, :3] = q
+    nrm = np.zeros((n_verts, 4), dtype=np.int8)
+    nrm[:, :3] = np.rint(np.clip(mesh.vertex_normals, -1.0, 1.0) * 127.0)
+    idx = np.ascontiguousarray(mesh.faces, dtype=np.uint32)
+    
+    blobs = [pos.tobytes(), nrm.tobytes(), idx.tobytes()]
+    offsets = np.cumsum([0] + [len(b) for b in blobs[:-1]]).tolist()
+    
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'mri-recon-portal'},
+        'extensionsUsed': ['KHR_mesh_quantization'],
+        'extensionsRequired': ['KHR_mesh_quantization'],
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{
+            'mesh': 0,
+            'translation': offset.tolist(),
+            'scale': step.tolist(),
+        }],
+        'meshes': [{'primitives': [{
+            'attributes': {'POSITION': 0, 'NORMAL': 1},
+            'indices': 2,
+            'mode': 4,
+        }]}],
+        'buffers': [{'byteLength': sum(len(b) for b in blobs)}],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': offsets[0], 'byteLength': len(blobs[0]),
+             'byteStride': 8, 'target': _GL_ARRAY_BUFFER},
+            {'buffer': 0, 'byteOffset': offsets[1], 'byteLength': len(blobs[1]),
+             'byteStride': 4, 'target': _GL_ARRAY_BUFFER},
+            {'buffer': 0, 'byteOffset': offsets[2], 'byteLength': len(blobs[2]),
+             'target': _GL_ELEMENT_ARRAY_BUFFER},
+        ],
+        'accessors': [
+            {'bufferView': 0, 'componentType': _GL_UNSIGNED_SHORT, 'count': n_verts, 'type': 'VEC3',
+             'min': q.min(axis=0).tolist(), 'max': q.max(axis=0).tolist()},
+            {'bufferView': 1, 'componentType': _GL_BYTE, 'normalized': True, 'count': n_verts, 'type': 'VEC3'},
+            {'bufferView': 2, 'componentType': _GL_UNSIGNED_INT, 'count': int(idx.size), 'type': 'SCALAR'},
+        ],
+    }
+    
+    return _glb_container(gltf, b''.join(blobs))
+
+
+def export_draco_glb(mesh: trimesh.Trimesh, position_bits: int = 14, normal_bits: int = 10,
+                     compression_level: int = 10) -> bytes:
+    """
+    KHR_draco_mesh_compression GLB를 프로세스 안에서 바로 생성 (DracoPy)
+    - 위치는 export_quantized_glb와 같은 position_bits 격자(uint16 + 노드 TRS)로 무손실 인코딩
+    - Node 기동/임시 파일 왕복 없이 메모리에서 처리
+    
+    Raises:
+        RuntimeError: DracoPy 미설치 시 (호출 측에서 CLI로 폴백)
+    """
+    if DracoPy is None:
+        raise RuntimeError("DracoPy is not installed")
+    
+    # 격자 좌표를 float32로 바로 생성 (uint16 → float32 재변환 사본 없음, 14비트 이하 정수는 float32로 정확)
+    q, offset, step = quantize_positions(np.asarray(mesh.vertices), bits=position_bits, dtype=np.float32)
+    levels = (1 << position_bits) - 1
+    # 원점 0, 범위 levels로 고정 → Draco 양자화 간격이 정확히 1이 되어 격자 좌표가 그대로 보존됨
+    draco_blob = DracoPy.encode(
+        q,
+        np.asarray(mesh.faces, dtype=np.uint32),
+        quantization_bits=position_bits,
+        quantization_range=float(levels),
+        quantization_origin=[0.0, 0.0, 0.0],
+        compression_level=compression_level,
+        normals=np.asarray(mesh.vertex_normals, dtype=np.float64),
+        normal_quantization_bits=normal_bits,
+    )
+    
+    # 속성 unique_id와 디코딩 후 정점/인덱스 수는 인코더가 결정 → 한 번 디코딩해 accessor에 반영
+    decoded = DracoPy.decode(draco_blob)
+    attribute_ids = {a['attribute_type']: a['unique_id'] for a in decoded.attributes}
+    n_points = len(decoded.points)
+    n_indices = int(np.asarray(decoded.faces).size)
+    position_id = attribute_ids[0]  # draco::GeometryAttribute::POSITION
+    normal_id = attribute_ids[1]    # draco::GeometryAttribute::NORMAL
+    
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'mri-recon-portal'},
+        'extensionsUsed': ['KHR_draco_mesh_compression', 'KHR_mesh_quantization'],
+        'extensionsRequired': ['KHR_draco_mesh_compression', 'KHR_mesh_quantization'],
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{
+            'mesh': 0,
+            'translation': offset.tolist(),
+            'scale': step.tolist(),
+        }],
+        'meshes': [{'primitives': [{
+            'attributes': {'POSITION': 0, 'NORMAL': 1},
+            'indices': 2,
+            'mode': 4,
+            'extensions': {'KHR_draco_mesh_compression': {
+                'bufferView': 0,
+                'attributes': {'POSITION': position_id, 'NORMAL': normal_id},
+            }},
+        }]}],
+        'buffers': [{'byteLength': len(draco_blob)}],
+        'bufferViews': [{'buffer': 0, 'byteOffset': 0, 'byteLength': len(draco_blob)}],
+        'accessors': [
+            {'componentType': _GL_UNSIGNED_SHORT, 'count': n_points, 'type': 'VEC3',
+             'min': q.min(axis=0).astype(int).tolist(), 'max': q.max(axis=0).astype(int).tolist()},
+            {'componentType': _GL_FLOAT, 'count': n_points, 'type': 'VEC3'},
+            {'componentType': _GL_UNSIGNED_INT, 'count': n_indices, 'type': 'SCALAR'},
+        ],
+    }
+    
+    return _glb_container(gltf, draco_blob)
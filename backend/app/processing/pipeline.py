@@ -15,7 +15,7 @@ from .io import list_series, load_series_by_files
 from .preprocess import n4_bias, to_isotropic, body_mask, resample_to_spacing
 from .register import rigid_register, fuse_max
 from .segment import edge_mask, muscle_mask, segment_bone_25d
-from .mesh import mask_to_mesh, export_meshes, mesh_from_mask
+from .mesh import mask_to_mesh, export_meshes, mesh_from_mask, simplify_mesh, MESH_TARGET_FACES
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +33,7 @@ class ReconOptions:
     use_superres: bool = False  # 초해상 재구성 사용 여부
     output_dir: Optional[Path] = None
     recon_id: Optional[str] = None
+    target_faces: Optional[int] = MESH_TARGET_FACES  # 내보내기 전 메쉬별 면 수 상한 (None이면 간소화 안 함)
     
     def __post_init__(self):
         if self.tissues is None:
@@ -258,9 +259,11 @@ def run_reconstruction(
                 vol_seg = resample_to_spacing(fused, seg_spacing, order=1)  # 선형
                 
                 # 2) 2.5D 슬라이스-연속성 기반 세그멘트
-                vol_arr = sitk.GetArrayFromImage(vol_seg).astype(np.float32)
-                # 정규화 (0..1)
-                vol_arr = (vol_arr - vol_arr.min()) / (vol_arr.max() - vol_arr.min() + 1e-6)
+                # resample_to_spacing 출력은 이미 Float32 → 복사 1회 후 제자리 정규화 (0..1)
+                vol_arr = sitk.GetArrayFromImage(vol_seg).astype(np.float32, copy=False)
+                vmin, vmax = vol_arr.min(), vol_arr.max()
+                vol_arr -= vmin
+                vol_arr /= (vmax - vmin + 1e-6)
                 bone_mask_25d = segment_bone_25d(vol_arr, logger=logger)
                 
                 # 3) 메싱 직전에만 등방 업샘플(마스크만, 최근접)
@@ -268,7 +271,8 @@ def run_reconstruction(
                 bone_mask_25d_sitk = sitk.GetImageFromArray(bone_mask_25d.astype(np.uint8))
                 bone_mask_25d_sitk.CopyInformation(vol_seg)
                 bone_mask_iso = resample_to_spacing(bone_mask_25d_sitk, iso_spacing, order=0)  # Nearest
-                bone_mask_arr = sitk.GetArrayFromImage(bone_mask_iso).astype(bool)
+                # astype(bool)이 사본을 만들므로 원본은 뷰로 읽음 (전체 볼륨 복사 1회 절약)
+                bone_mask_arr = sitk.GetArrayViewFromImage(bone_mask_iso).astype(bool)
                 
                 # 4) 메싱: 얇은 피질 보존(step_size=1)
                 bone_mesh, stats = mesh_from_mask(bone_mask_arr, iso_spacing, logger=logger)
@@ -302,7 +306,18 @@ def run_reconstruction(
     if not meshes:
         raise ValueError("No meshes generated (check tissue options)")
     
-    # 5) 내보내기
+    # 5) 내보내기 전 간소화: GLB/STL 크기와 Draco 인코딩 시간은 면 수에 비례하므로 상한까지 Quadric 간소화
+    if opts.target_faces:
+        for i, m in enumerate(meshes):
+            n_faces = len(m.faces)
+            if n_faces > opts.target_faces:
+                try:
+                    meshes[i] = simplify_mesh(m, opts.target_faces)
+                    logger.info(f"Decimated mesh {i} before export: {n_faces} -> {len(meshes[i].faces)} faces")
+                except Exception as e:
+                    logger.warning(f"Decimation before export failed: {e}, exporting full mesh")
+    
+    # 6) 내보내기
     if opts.output_dir and opts.recon_id:
         glb = Path(opts.output_dir) / f"{opts.recon_id}.glb"
         stl = Path(opts.output_dir) / f"{opts.recon_id}.stl"
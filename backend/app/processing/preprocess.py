@@ -9,6 +9,28 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# N4 bias field 추정용 축소 배율 (bias field는 저주파라 축소 영상에서 추정해도 품질 차이 없음)
+N4_SHRINK_FACTOR = 4
+
+
+def n4_correct_shrunk(img_float: sitk.Image, mask: sitk.Image, shrink: int = N4_SHRINK_FACTOR,
+                      iterations=(25, 25, 25, 25)) -> sitk.Image:
+    """
+    축소 영상에서 N4 bias field를 추정하고 전해상도 영상에 적용
+    (축당 최소 16 복셀이 남도록 배율 제한, 보정 결과는 float32)
+    """
+    factors = [max(1, min(shrink, size // 16)) for size in img_float.GetSize()]
+    small = sitk.Shrink(img_float, factors)
+    small_mask = sitk.Shrink(mask, factors)
+    
+    corrector = sitk.N4BiasFieldCorrectionImageFilter()
+    corrector.SetMaximumNumberOfIterations(list(iterations))
+    corrector.Execute(small, small_mask)
+    
+    # 로그 bias field를 전해상도 격자로 복원해 나눔
+    log_bias = corrector.GetLogBiasFieldAsImage(img_float)
+    return sitk.Cast(img_float / sitk.Exp(log_bias), sitk.sitkFloat32)
+
 
 def n4_bias(img: sitk.Image) -> sitk.Image:
     """
@@ -39,9 +61,7 @@ def n4_bias(img: sitk.Image) -> sitk.Image:
     mask = sitk.OtsuThreshold(img_float, 0, 1, 200)
     
     try:
-        corrector = sitk.N4BiasFieldCorrectionImageFilter()
-        corrector.SetMaximumNumberOfIterations([50, 50, 50, 50])  # 4 levels
-        corrected = corrector.Execute(img_float, mask)
+        corrected = n4_correct_shrunk(img_float, mask)
         logger.info("N4 bias correction completed")
         return corrected
     except Exception as e:
@@ -136,7 +156,7 @@ def resample_to_spacing(img: sitk.Image, target_spacing: tuple, order: int = 1)
 
 def body_mask(img_iso: sitk.Image) -> sitk.Image:
     """
-    CurvatureFlow 기반 바디마스크 생성
+    재귀 가우시안 기반 바디마스크 생성
     부드럽게 → Otsu → 가장 큰 연결요소만 남김
     
     Args:
@@ -145,17 +165,18 @@ def body_mask(img_iso: sitk.Image) -> sitk.Image:
     Returns:
         sitk.Image: 바디 마스크 (binary)
     """
-    logger.info("Creating body mask using CurvatureFlow...")
-    # CurvatureFlow로 부드럽게 (경계 보존하면서 노이즈 제거)
-    sm = sitk.CurvatureFlow(img_iso, timeStep=0.125, numberOfIterations=5)
+    logger.info("Creating body mask using recursive Gaussian smoothing...")
+    # Otsu 안정화용 노이즈 제거: 축별 IIR 1패스 (CurvatureFlow 5회 반복 PDE 대비 O(N))
+    sm = sitk.SmoothingRecursiveGaussian(img_iso, sigma=1.0)
     
     # Otsu 임계값으로 바디 마스크 생성
     try:
         m = sitk.OtsuThreshold(sm, 0, 1, 200)
     except Exception as e:
         logger.warning(f"Otsu threshold failed: {e}, using median threshold")
-        arr = sitk.GetArrayFromImage(sm)
-        median_threshold = np.median(arr)
+        # 4×4×4 격자 부분 샘플(1/64, 복사 없는 strided 뷰)의 중앙값으로 임계값 추정
+        arr = sitk.GetArrayViewFromImage(sm)
+        median_threshold = float(np.median(arr[::4, ::4, ::4]))
         m = sitk.BinaryThreshold(sm, median_threshold, 1e9, 1, 0)
     
     # Morphological closing으로 구멍 메우기
@@ -166,8 +187,10 @@ def body_mask(img_iso: sitk.Image) -> sitk.Image:
     rel = sitk.RelabelComponent(cc, sortByObjectSize=True)
     m = sitk.BinaryThreshold(rel, 1, 1)
     
-    mask_arr = sitk.GetArrayFromImage(m).astype(bool)
-    logger.info(f"Body mask: {np.sum(mask_arr)} / {mask_arr.size} pixels ({100*np.sum(mask_arr)/mask_arr.size:.1f}%)")
+    # 로그용 카운트만 필요 → 복사/bool 변환 없이 SimpleITK 버퍼 뷰에서 직접 셈 (m이 살아 있는 동안만 유효)
+    mask_view = sitk.GetArrayViewFromImage(m)
+    body_voxels = int(np.count_nonzero(mask_view))
+    logger.info(f"Body mask: {body_voxels} / {mask_view.size} pixels ({100*body_voxels/mask_view.size:.1f}%)")
     
     return m
 
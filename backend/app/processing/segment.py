@@ -5,9 +5,8 @@ GMM 기반 확률 지도 세그멘테이션 (뼈/근육)
 """
 import numpy as np
 import SimpleITK as sitk
-from skimage import morphology
 from sklearn.mixture import GaussianMixture
-from scipy.ndimage import gaussian_filter, binary_opening, binary_closing, binary_fill_holes, label, gaussian_gradient_magnitude, generate_binary_structure
+from scipy.ndimage import gaussian_filter, binary_opening, binary_closing, binary_fill_holes, label, gaussian_gradient_magnitude, generate_binary_structure, grey_opening, grey_closing
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,6 +15,41 @@ logger = logging.getLogger(__name__)
 TARGET_MIN, TARGET_MAX = 0.008, 0.08
 
 
+def _box_closing(mask: np.ndarray, size: int) -> np.ndarray:
+    """
+    박스(size^3) 구조요소 closing
+    grey_closing은 축별 1D min/max 필터로 분리 계산 (27탭 → 3x3탭), binary_closing과 동일 결과
+    """
+    m = grey_closing(mask.astype(np.uint8, copy=False), size=(size,) * mask.ndim, mode='constant', cval=0)
+    return m.astype(bool)
+
+
+def _box_opening(mask: np.ndarray, size: int) -> np.ndarray:
+    """박스(size^3) 구조요소 opening (축별 분리 계산, binary_opening과 동일 결과)"""
+    m = grey_opening(mask.astype(np.uint8, copy=False), size=(size,) * mask.ndim, mode='constant', cval=0)
+    return m.astype(bool)
+
+
+def _hist_percentile(a: np.ndarray, q, bins: int = 4096):
+    """
+    히스토그램 누적합 기반 백분위수 (정렬/분할 사본 없이 O(N) 한 패스)
+    빈 내부는 선형 보간 → 오차는 (max-min)/bins 이내, 임계값 추정용
+    """
+    lo, hi = float(a.min()), float(a.max())
+    qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    if hi <= lo:
+        out = np.full(qs.shape, lo)
+    else:
+        hist, edges = np.histogram(a, bins=bins, range=(lo, hi))
+        cum = np.cumsum(hist)
+        rank = qs / 100.0 * (a.size - 1)
+        idx = np.minimum(np.searchsorted(cum, rank, side='right'), bins - 1)
+        below = np.where(idx > 0, cum[idx - 1], 0)
+        frac = (rank - below) / np.maximum(hist[idx], 1)
+        out = edges[idx] + np.clip(frac, 0.0, 1.0) * (edges[idx + 1] - edges[idx])
+    return out if np.ndim(q) else float(out[0])
+
+
 def _largest_k_2d(mask2d: np.ndarray, k: int = 2) -> np.ndarray:
     """2D 마스크에서 상위 k개 연결 컴포넌트만 유지"""
     se = generate_binary_structure(2, 1)
@@ -46,7 +80,7 @@ def segment_bone_25d(vol3d: np.ndarray, logger=None) -> np.ndarray:
     prev = None
     
     # 아주 느슨한 body
-    body_thresh = np.percentile(vol3d, 5)
+    body_thresh = _hist_percentile(vol3d, 5)
     body = vol3d > body_thresh
     if logger:
         logger.info(f"Body mask loose threshold: p5={body_thresh:.3f}")
@@ -151,15 +185,16 @@ def _postprocess_bone_mask(bone_mask: np.ndarray, body_mask: np.ndarray) -> tupl
     bone = binary_fill_holes(bone)
     
     # 연결 컴포넌트 중 큰 것만 남기기 (상위 3개)
-    lbl, n_components = label(bone, structure=se)
-    if n_components > 0:
-        vals, counts = np.unique(lbl[lbl > 0], return_counts=True)
-        if len(vals) > 3:
-            keep = vals[np.argsort(counts)[-3:]]
-            bone = np.isin(lbl, keep)
-            logger.info(f"Kept top 3 components from {n_components} total")
-        else:
-            logger.info(f"Kept {len(vals)} components")
+    # SimpleITK 라벨링(6-연결) + 크기순 재라벨 → 라벨 1~3만 임계 (np.unique/np.isin 전체 볼륨 사본 없음)
+    relabel = sitk.RelabelComponentImageFilter()
+    relabel.SortByObjectSizeOn()
+    relabeled = relabel.Execute(sitk.ConnectedComponent(sitk.GetImageFromArray(bone.view(np.uint8)), False))
+    n_components = relabel.GetNumberOfObjects()
+    if n_components > 3:
+        bone = sitk.GetArrayFromImage(sitk.BinaryThreshold(relabeled, 1, 3, 1, 0)).view(bool)
+        logger.info(f"Kept top 3 components from {n_components} total")
+    elif n_components > 0:
+        logger.info(f"Kept {n_components} components")
     
     # 커버리지 계산
     cov = bone.sum() / max(body_mask.sum(), 1)
@@ -222,7 +257,7 @@ def _body_mask(arr: np.ndarray) -> np.ndarray:
     blurred = gaussian_filter(arr, sigma=0.8)
     arr_sitk = sitk.GetImageFromArray(blurred.astype(np.float32))
     thr_img = sitk.OtsuThreshold(arr_sitk, 0, 1, 200)
-    thr_val = sitk.GetArrayFromImage(thr_img)
+    thr_val = sitk.GetArrayViewFromImage(thr_img)  # 비교에만 쓰므로 복사 없는 뷰 (thr_img가 함수 끝까지 유지)
     # Otsu 결과가 이미지면 threshold 값 추출
     if thr_val.size > 1:
         # 마스크 이미지로 반환된 경우
@@ -232,7 +267,7 @@ def _body_mask(arr: np.ndarray) -> np.ndarray:
         threshold = thr_val.item() if thr_val.size == 1 else np.median(blurred)
         m = blurred > threshold
     # 작은 조각 제거
-    m = binary_closing(m, structure=np.ones((3, 3, 3)))
+    m = _box_closing(m, 3)
     return m
 
 
@@ -250,12 +285,13 @@ def segment_bone_and_muscle(vol_nii: sitk.Image, want=('bone',)) -> dict:
     """
     logger.info("Starting GMM-based segmentation...")
     
-    vol = sitk.GetArrayFromImage(vol_nii).astype(np.float32)  # z,y,x
+    vol = sitk.GetArrayFromImage(vol_nii).astype(np.float32, copy=False)  # z,y,x
     
-    # 정규화 (5-95 percentile)
-    p5, p95 = np.percentile(vol, [5, 95])
-    vol = (vol - p5) / (p95 - p5 + 1e-6)
-    vol = np.clip(vol, 0, 1)
+    # 정규화 (5-95 percentile) - 단일 배열에서 제자리 연산, 백분위수는 히스토그램 한 패스
+    p5, p95 = _hist_percentile(vol, [5, 95])
+    vol -= p5
+    vol /= (p95 - p5 + 1e-6)
+    np.clip(vol, 0, 1, out=vol)
     
     # 바디 마스크 생성
     body = _body_mask(vol)
@@ -319,7 +355,7 @@ def segment_bone_and_muscle(vol_nii: sitk.Image, want=('bone',)) -> dict:
             muscle_post[body] = post_probs[:, muscle_idx]
             
             muscle = muscle_post > np.percentile(muscle_post[body], 65)
-            muscle = binary_opening(muscle, structure=np.ones((2, 2, 2)))
+            muscle = _box_opening(muscle, 2)
             
             muscle_ratio = muscle.sum() / float(body.sum())
             logger.info(f"Muscle mask: {muscle.sum()} / {vol.size} pixels ({muscle_ratio*100:.1f}% of body)")
@@ -1,8 +1,21 @@
 from minio import Minio
 from minio.error import S3Error
 from app.core.config import settings
+from concurrent.futures import ThreadPoolExecutor
 import io
-from typing import Optional
+import os
+import time
+from typing import List, Optional
+
+# 동시 다운로드 수: Minio 기본 urllib3 풀(maxsize=10) 안에서 연결을 재사용하도록 제한
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# 업로드 파트 크기: 이보다 큰 객체는 멀티파트로 나눠 스트리밍 업로드
+UPLOAD_PART_SIZE = 8 * 1024 * 1024
+# 다운로드 재시도: 일시적 네트워크/서버 오류만 지수 백오프로 재시도 (없는 객체/권한 오류는 즉시 실패)
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_RETRY_BACKOFF = 0.5
+PERMANENT_S3_ERRORS = {'NoSuchKey', 'NoSuchBucket', 'AccessDenied'}
 
 
 class StorageClient:
@@ -44,14 +57,84 @@ class StorageClient:
         except S3Error as e:
             raise Exception(f"Failed to upload file: {e}")
     
+    def upload_fileobj(self, object_name: str, file_obj, content_type: str = "application/octet-stream",
+                       length: int = -1, part_size: int = UPLOAD_PART_SIZE) -> str:
+        """Stream file-like object to MinIO in part_size chunks (length=-1 if size is unknown)"""
+        try:
+            self.client.put_object(
+                settings.MINIO_BUCKET_NAME,
+                object_name,
+                file_obj,
+                length=length,
+                part_size=part_size,
+                content_type=content_type
+            )
+            return object_name
+        except S3Error as e:
+            raise Exception(f"Failed to upload file: {e}")
+    
+    def upload_path(self, object_name: str, file_path: str, content_type: str = "application/octet-stream",
+                    part_size: int = UPLOAD_PART_SIZE) -> str:
+        """Stream a local file to MinIO in part_size chunks (file is never loaded whole into memory)"""
+        try:
+            self.client.fput_object(
+                settings.MINIO_BUCKET_NAME,
+                object_name,
+                str(file_path),
+                content_type=content_type,
+                part_size=part_size
+            )
+            return object_name
+        except S3Error as e:
+            raise Exception(f"Failed to upload file: {e}")
+    
     def get_file(self, object_name: str) -> Optional[bytes]:
         """Download file from MinIO"""
+        response = None
         try:
             response = self.client.get_object(settings.MINIO_BUCKET_NAME, object_name)
             return response.read()
         except S3Error as e:
             print(f"Error getting file: {e}")
             return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+    
+    def download_file(self, object_name: str, file_path: str, retries: int = DOWNLOAD_RETRIES) -> bool:
+        """Stream file from MinIO directly to disk (no full in-memory copy), retrying transient errors"""
+        for attempt in range(retries + 1):
+            response = None
+            try:
+                response = self.client.get_object(settings.MINIO_BUCKET_NAME, object_name)
+                with open(file_path, 'wb') as f:
+                    for chunk in response.stream(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                return True
+            except Exception as e:
+                if os.path.exists(file_path):
+                    os.unlink(file_path)
+                permanent = isinstance(e, S3Error) and e.code in PERMANENT_S3_ERRORS
+                if permanent or attempt == retries:
+                    print(f"Error downloading file {object_name}: {e}")
+                    return False
+                print(f"Retrying download of {object_name} ({attempt + 1}/{retries}): {e}")
+                time.sleep(DOWNLOAD_RETRY_BACKOFF * (2 ** attempt))
+            finally:
+                if response is not None:
+                    response.close()
+                    response.release_conn()
+        return False
+    
+    def download_files(self, object_names: List[str], dest_dir: str, max_workers: int = DOWNLOAD_WORKERS) -> List[str]:
+        """Download objects concurrently into dest_dir, returning local paths in input order (failures skipped)"""
+        # 입력 순번을 접두사로 붙여 basename이 같은 객체끼리 같은 파일에 동시 기록/삭제하지 않도록 함
+        file_paths = [os.path.join(dest_dir, f"{i:05d}_{os.path.basename(name)}")
+                      for i, name in enumerate(object_names)]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            ok = list(pool.map(self.download_file, object_names, file_paths))
+        return [path for path, success in zip(file_paths, ok) if success]
     
     def get_presigned_url(self, object_name: str, expires_seconds: int = 3600) -> str:
         """Generate URL for file access (uses backend proxy to avoid CORS issues)"""
@@ -0,0 +1,48 @@
+// gltf-transform Draco 압축 상주 워커
+// Node 기동 + 모듈/WASM 로드를 한 번만 하고, stdin의 JSON 라인 요청을 순서대로 처리해 stdout으로 JSON 라인 응답
+//   요청: {"input_path": "...", "output_path": "...", "options": {...draco() 옵션}}
+//   응답: {"ok": true} 또는 {"ok": false, "error": "..."}
+// 시작 완료 시 {"ready": true} 한 줄을 먼저 출력
+const readline = require('readline')
+const { Logger, NodeIO } = require('@gltf-transform/core')
+const { ALL_EXTENSIONS } = require('@gltf-transform/extensions')
+const { draco } = require('@gltf-transform/functions')
+const draco3d = require('draco3dgltf')
+
+function reply(obj) {
+  process.stdout.write(JSON.stringify(obj) + '\n')
+}
+
+// stdout은 JSON 라인 응답 전용 채널: 의존 모듈의 console 출력은 stderr로 돌림
+console.log = console.info = console.debug = (...args) => console.error(...args)
+
+async function main() {
+  const io = new NodeIO()
+    .setLogger(new Logger(Logger.Verbosity.SILENT))
+    .registerExtensions(ALL_EXTENSIONS)
+    .registerDependencies({
+      'draco3d.decoder': await draco3d.createDecoderModule(),
+      'draco3d.encoder': await draco3d.createEncoderModule(),
+    })
+
+  reply({ ready: true })
+
+  const rl = readline.createInterface({ input: process.stdin, terminal: false })
+  for await (const line of rl) {
+    if (!line.trim()) continue
+    try {
+      const req = JSON.parse(line)
+      const doc = await io.read(req.input_path)
+      await doc.transform(draco(req.options || {}))
+      await io.write(req.output_path, doc)
+      reply({ ok: true })
+    } catch (err) {
+      reply({ ok: false, error: String((err && err.stack) || err) })
+    }
+  }
+}
+
+main().catch((err) => {
+  process.stderr.write(`gltf-transform worker failed to start: ${(err && err.stack) || err}\n`)
+  process.exit(1)
+})
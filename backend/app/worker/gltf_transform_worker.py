@@ -0,0 +1,113 @@
+"""
+gltf-transform 상주 Node 워커 클라이언트
+작업마다 npx/CLI로 Node를 새로 띄우는 대신, 한 번 띄운 프로세스에 JSON 라인으로 압축 요청
+"""
+import json
+import logging
+import select
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = Path(__file__).with_name('gltf_transform_worker.js')
+STARTUP_TIMEOUT = 30
+
+# CLI 옵션(--draco-compression-level 10 등)에 대응하는 gltf-transform draco() 옵션
+DRACO_OPTIONS = {
+    'method': 'edgebreaker',
+    'encodeSpeed': 0,  # 압축 레벨 10 = 최대 압축
+    'quantizePosition': 14,
+    'quantizeNormal': 10,
+    'quantizeColor': 8,
+    'quantizeTexcoord': 12,
+}
+
+
+class GltfTransformWorker:
+    """상주 Node 프로세스 래퍼 (요청은 직렬화, 비정상 종료/타임아웃 시 다음 요청에서 재기동)"""
+
+    def __init__(self, script: Path = WORKER_SCRIPT):
+        self.script = script
+        self._proc = None
+        self._lock = threading.Lock()
+        self._broken = False  # node/모듈이 없어 기동 자체가 불가능한 경우 재시도하지 않음
+
+    @property
+    def available(self) -> bool:
+        return not self._broken
+
+    def _readline(self, timeout: float) -> dict:
+        ready, _, _ = select.select([self._proc.stdout], [], [], timeout)
+        if not ready:
+            raise TimeoutError(f"gltf-transform worker did not respond within {timeout}s")
+        line = self._proc.stdout.readline()
+        if not line:
+            raise RuntimeError(f"gltf-transform worker exited (code={self._proc.poll()})")
+        return json.loads(line)
+
+    def _stop(self):
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def _ensure_started(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        self._proc = None
+        node = shutil.which('node')
+        if node is None or not self.script.exists():
+            self._broken = True
+            raise RuntimeError("node or gltf-transform worker script not found")
+
+        self._proc = subprocess.Popen(
+            [node, str(self.script)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        try:
+            if not self._readline(STARTUP_TIMEOUT).get('ready'):
+                raise RuntimeError("unexpected handshake from gltf-transform worker")
+        except Exception:
+            self._stop()
+            self._broken = True
+            raise
+        logger.info(f"gltf-transform worker started (pid={self._proc.pid})")
+
+    def start(self):
+        """워커를 미리 기동 (모듈/WASM 로드 비용을 첫 작업 전에 지불)"""
+        with self._lock:
+            self._ensure_started()
+
+    def compress(self, input_path: str, output_path: str, options: dict = None, timeout: float = 300):
+        """input_path GLB를 Draco 압축해 output_path에 기록 (실패 시 예외)"""
+        if self._broken:
+            raise RuntimeError("gltf-transform worker unavailable")
+
+        request = {
+            'input_path': input_path,
+            'output_path': output_path,
+            'options': options if options is not None else DRACO_OPTIONS,
+        }
+        with self._lock:
+            self._ensure_started()
+            try:
+                self._proc.stdin.write(json.dumps(request) + '\n')
+                self._proc.stdin.flush()
+                response = self._readline(timeout)
+            except Exception:
+                # 응답이 어긋난 프로세스는 재사용하지 않음
+                self._stop()
+                raise
+
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'unknown gltf-transform worker error'))
+
+
+gltf_transform_worker = GltfTransformWorker()
@@ -1,23 +1,66 @@
 import SimpleITK as sitk
 import numpy as np
-from skimage import measure, morphology
 from skimage.filters import threshold_otsu
 from scipy import ndimage as ndi
 import trimesh
 from app.models.reconstruction import Reconstruction
 from app.utils.storage import storage_client
 from app.core.config import settings
+from app.worker.gltf_transform_worker import gltf_transform_worker
+from app.processing.preprocess import n4_correct_shrunk
+from app.processing.mesh import MESH_TARGET_FACES, export_draco_glb, export_quantized_glb, extract_isosurface, largest_component, smooth_and_simplify, write_binary_stl
 from sqlalchemy.orm import Session
-import io
 import tempfile
 import os
+import hashlib
 import logging
+import shutil
 import subprocess
 from collections import defaultdict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import pydicom
 
+try:
+    from nvidia import nvimgcodec
+except ImportError:  # 선택적 의존성: JPEG 2000/HTJ2K 배치 GPU 디코딩 (없으면 pydicom CPU 디코딩)
+    nvimgcodec = None
+
 logger = logging.getLogger(__name__)
 
+# Draco 압축 CLI: 전역 설치된 gltf-transform 경로를 모듈 로드 시 한 번만 해석
+# (매 작업마다 npx가 Node 기동 + 패키지 재해석하는 비용 회피, 없으면 npx로 폴백)
+GLTF_TRANSFORM_BIN = shutil.which('gltf-transform')
+# 일회성 CLI 사용 가능 여부: 둘 다 없으면 매 작업마다 실행 시도/실패 비용 없이 바로 비압축 GLB 사용
+# (실행 파일이 없거나 npx가 패키지를 해석하지 못해 실패하면 프로세스 수명 동안 비활성화)
+_draco_cli_available = bool(GLTF_TRANSFORM_BIN or shutil.which('npx'))
+
+# Draco 압축 중간 GLB 임시 파일 위치: gltf-transform는 GLB를 파일 경로로만 주고받으므로
+# 쓰기 가능한 tmpfs(/dev/shm)가 있으면 그곳에 두어 물리 디스크 IO 회피 (없으면 기본 임시 디렉터리)
+GLB_SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+# STL 업로드용 스풀 파일: 이 크기까지는 메모리, 넘으면 임시 파일로 기록
+STL_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# nvImageCodec GPU 디코딩 대상 전송구문 (JPEG 2000 / HTJ2K)
+GPU_DECODE_TRANSFER_SYNTAXES = {
+    '1.2.840.10008.1.2.4.90', '1.2.840.10008.1.2.4.91',
+    '1.2.840.10008.1.2.4.201', '1.2.840.10008.1.2.4.202', '1.2.840.10008.1.2.4.203',
+}
+
+# DICOM 헤더 스캔 스레드 수 (작은 읽기/디스크 대기가 대부분이라 코어 수보다 많이)
+HEADER_READ_WORKERS = (os.cpu_count() or 1) * 2
+
+# 헤더 스캔에서 파싱할 태그 (시리즈/스택 분류, 점수화, 기하 검증, 슬라이스 정렬, 볼륨 캐시 키에서 읽는 것만)
+# 픽셀 디코딩(_decode_slice)은 파일을 다시 전체로 읽으므로 여기에 포함하지 않음
+# 부분 파싱된 데이터셋에 없는 태그는 getattr 기본값(None)으로 조용히 빠지므로, 소비자를 추가/삭제할 때 함께 갱신
+HEADER_TAGS = [
+    'SeriesInstanceUID', 'SeriesDescription', 'ImageType',
+    'Rows', 'Columns', 'PixelSpacing', 'SliceThickness', 'SpacingBetweenSlices',
+    'ImageOrientationPatient', 'ImagePositionPatient', 'InstanceNumber',
+    'SOPInstanceUID',  # _volume_cache_key
+]
+
 
 def is_same_protocol(ds_a, ds_b):
     """시리즈 프로토콜이 동일한지 확인 (로컬라이저 제외)"""
@@ -45,6 +88,10 @@ def is_same_protocol(ds_a, ds_b):
             get(ds_a, 'PixelSpacing') == get(ds_b, 'PixelSpacing'))
 
 
+# 3D 시퀀스 판별 키워드 (SeriesDescription/ImageType 대문자 기준)
+KEYWORDS_3D = ('3D', 'VIBE', 'CUBE', 'SPACE', 'BRAVO', 'MPRAGE', 'FSPGR')
+
+
 def score_stack_for_3d(stack_files):
     """
     스택을 3D 볼륨 적합도로 점수화
@@ -74,9 +121,9 @@ def score_stack_for_3d(stack_files):
         'reason': []
     }
     
-    # 1) 3D 시퀀스 키워드 체크 (높은 가점)
-    if any(keyword in series_desc or keyword in image_type 
-           for keyword in ['3D', 'VIBE', 'CUBE', 'SPACE', 'BRAVO', 'MPRAGE', 'FSPGR']):
+    # 1) 3D 시퀀스 키워드 체크 (높은 가점, 두 문자열을 합쳐 키워드당 한 번만 검색)
+    combined = f"{series_desc}|{image_type}"
+    if any(keyword in combined for keyword in KEYWORDS_3D):
         score += 100
         metadata['is_3d'] = True
         metadata['reason'].append('3D sequence keyword found')
@@ -119,36 +166,68 @@ def score_stack_for_3d(stack_files):
     return (score, metadata)
 
 
+def _read_series_header(dicom_path):
+    """
+    DICOM 헤더를 읽어 (ds, series_uid) 반환
+    UID 없음/LOCALIZER/SCOUT/읽기 실패 시 None
+    """
+    try:
+        ds = pydicom.dcmread(dicom_path, stop_before_pixels=True, specific_tags=HEADER_TAGS)
+        series_uid = getattr(ds, 'SeriesInstanceUID', None)
+        if not series_uid:
+            logger.warning(f"No SeriesInstanceUID in {os.path.basename(dicom_path)}, skipping")
+            return None
+        
+        # 로컬라이저 제외
+        image_type = str(getattr(ds, 'ImageType', '') or '').upper()
+        if 'LOCALIZER' in image_type or 'SCOUT' in image_type:
+            logger.info(f"Skipping LOCALIZER/SCOUT: {os.path.basename(dicom_path)}")
+            return None
+        
+        return ds, series_uid
+    except Exception as e:
+        logger.warning(f"Failed to read DICOM metadata from {dicom_path}: {e}")
+        return None
+
+
 def group_by_series_uid(dicom_paths):
     """
     DICOM 파일들을 SeriesInstanceUID별로 그룹화
+    헤더 읽기는 스레드 풀로 병렬, 집계는 입력 순서대로 직렬
     반환: dict {series_uid: [(file_path, pydicom.Dataset), ...]}
     """
     by_series = defaultdict(list)
     
-    for dicom_path in dicom_paths:
-        try:
-            ds = pydicom.dcmread(dicom_path, stop_before_pixels=True)
-            series_uid = getattr(ds, 'SeriesInstanceUID', None)
-            if not series_uid:
-                logger.warning(f"No SeriesInstanceUID in {os.path.basename(dicom_path)}, skipping")
-                continue
-            
-            # 로컬라이저 제외
-            image_type = str(getattr(ds, 'ImageType', '') or '').upper()
-            if 'LOCALIZER' in image_type or 'SCOUT' in image_type:
-                logger.info(f"Skipping LOCALIZER/SCOUT: {os.path.basename(dicom_path)}")
+    with ThreadPoolExecutor(max_workers=HEADER_READ_WORKERS) as executor:
+        for dicom_path, header in zip(dicom_paths, executor.map(_read_series_header, dicom_paths)):
+            if header is None:
                 continue
-            
+            ds, series_uid = header
             by_series[series_uid].append((dicom_path, ds))
-        except Exception as e:
-            logger.warning(f"Failed to read DICOM metadata from {dicom_path}: {e}")
-            continue
     
     logger.info(f"Grouped {len(dicom_paths)} files into {len(by_series)} series by SeriesInstanceUID")
     return dict(by_series)
 
 
+def header_geometry_columns(series_files):
+    """
+    (file_path, ds) 리스트의 기하 헤더를 열 배열(SoA)로 추출
+    반환: {'rows': (N,), 'columns': (N,), 'pixel_spacing': (N,2)} float64, 값 없음은 NaN
+    """
+    def num(v):
+        return np.nan if v is None else float(v)
+    
+    def spacing(ds):
+        ps = [float(x) for x in (getattr(ds, 'PixelSpacing', None) or [])][:2]
+        return ps + [np.nan] * (2 - len(ps))
+    
+    return {
+        'rows': np.array([num(getattr(ds, 'Rows', None)) for _, ds in series_files], dtype=np.float64),
+        'columns': np.array([num(getattr(ds, 'Columns', None)) for _, ds in series_files], dtype=np.float64),
+        'pixel_spacing': np.array([spacing(ds) for _, ds in series_files], dtype=np.float64).reshape(-1, 2),
+    }
+
+
 def validate_series_geometry(series_files):
     """
     같은 Series 내에서 이미지 크기/PixelSpacing/IOP/IPP 일관성 검증
@@ -157,23 +236,23 @@ def validate_series_geometry(series_files):
     if not series_files:
         return False, ["Empty series"]
     
-    errors = []
-    first_ds = series_files[0][1]
+    # 파일별 헤더 값을 열(column) 배열로 한 번에 추출 (값 없음은 NaN) → 첫 파일 기준 비교를 벡터화
+    geometry = header_geometry_columns(series_files)
     
-    # 기준값
-    ref_rows = getattr(first_ds, 'Rows', None)
-    ref_columns = getattr(first_ds, 'Columns', None)
-    ref_pixel_spacing = tuple(getattr(first_ds, 'PixelSpacing', ()) or [])
+    def differs(col):
+        ref = col[:1]
+        return ((col != ref) & ~(np.isnan(col) & np.isnan(ref))).reshape(len(col), -1).any(axis=1)
     
-    for f, ds in series_files[1:]:
-        # Rows/Columns 체크
-        if getattr(ds, 'Rows', None) != ref_rows or getattr(ds, 'Columns', None) != ref_columns:
-            errors.append(f"Inconsistent matrix size in {os.path.basename(f)}")
-        
-        # PixelSpacing 체크
-        pixel_spacing = tuple(getattr(ds, 'PixelSpacing', ()) or [])
-        if pixel_spacing != ref_pixel_spacing:
-            errors.append(f"Inconsistent PixelSpacing in {os.path.basename(f)}")
+    bad_matrix = differs(geometry['rows']) | differs(geometry['columns'])
+    bad_spacing = differs(geometry['pixel_spacing'])
+    
+    errors = []
+    for i in np.flatnonzero(bad_matrix | bad_spacing):
+        name = os.path.basename(series_files[i][0])
+        if bad_matrix[i]:
+            errors.append(f"Inconsistent matrix size in {name}")
+        if bad_spacing[i]:
+            errors.append(f"Inconsistent PixelSpacing in {name}")
     
     if errors:
         logger.warning(f"Geometry inconsistencies found: {errors}")
@@ -189,37 +268,59 @@ def group_stacks_by_orientation(series_files, cos_eps=1e-3):
     """
     groups = []
     
+    # IOP를 (N,6) 배열로 모아 법선을 한 번에 계산
+    oriented, files_without_orientation = [], []
     for f, ds in series_files:
-        if not hasattr(ds, 'ImageOrientationPatient') or ds.ImageOrientationPatient is None:
-            continue
-        
-        try:
-            u = np.array(ds.ImageOrientationPatient[:3], dtype=float)
-            v = np.array(ds.ImageOrientationPatient[3:], dtype=float)
-            
-            n_cross = np.cross(u, v)
-            n_norm = np.linalg.norm(n_cross)
-            if n_norm < 1e-6:
+        if getattr(ds, 'ImageOrientationPatient', None) is None:
+            files_without_orientation.append((f, ds))
+        else:
+            oriented.append((f, ds))
+    
+    # 빠른 경로: 모든 IOP가 6개 값이면 슬라이스별 배열 생성 없이 한 번에 변환
+    try:
+        iops = np.array([ds.ImageOrientationPatient for _, ds in oriented], dtype=float).reshape(len(oriented), 6)
+    except (ValueError, TypeError):
+        # 형식이 잘못된 IOP가 섞여 있으면 파일별로 검사해 해당 파일만 제외
+        checked, rows = [], []
+        for f, ds in oriented:
+            try:
+                iop = np.array(ds.ImageOrientationPatient, dtype=float)
+                if iop.shape != (6,):
+                    raise ValueError(f"expected 6 values, got {iop.size}")
+            except Exception as e:
+                logger.warning(f"Error processing orientation for {os.path.basename(f)}: {e}")
                 continue
-            n = n_cross / n_norm
-            
-            placed = False
-            for g in groups:
-                if abs(np.dot(n, g['n'])) > 1 - cos_eps:
-                    g['files'].append((f, ds))
-                    placed = True
-                    break
-            
-            if not placed:
-                groups.append({'n': n, 'files': [(f, ds)]})
-                
-        except Exception as e:
-            logger.warning(f"Error processing orientation for {os.path.basename(f)}: {e}")
-            continue
+            checked.append((f, ds))
+            rows.append(iop)
+        oriented = checked
+        iops = np.array(rows, dtype=float).reshape(-1, 6)
+    
+    if len(iops):
+        normals = np.cross(iops[:, :3], iops[:, 3:])
+        norms = np.linalg.norm(normals, axis=1)
+        valid = norms >= 1e-6
+        normals[valid] /= norms[valid, None]
+        
+        # 같은 스택의 슬라이스는 IOP가 비트 단위로 같으므로 법선을 고유 키로 묶어
+        # 군집화는 고유 법선(보통 수 개)에 대해서만 수행하고 파일은 키 인덱스로 배정
+        valid_idx = np.flatnonzero(valid)
+        uniq, first_idx, inverse = np.unique(
+            normals[valid_idx], axis=0, return_index=True, return_inverse=True
+        )
+        inverse = inverse.ravel()
+        
+        # 그리디 군집화: 미배정 법선 중 가장 먼저 나온 것을 대표로, 평행한 법선 전체를 한 번에 배정
+        # (파일별로 기존 그룹을 순서대로 비교하던 방식과 동일한 결과)
+        unassigned = np.argsort(first_idx)
+        while unassigned.size:
+            rep = uniq[unassigned[0]]
+            member = np.abs(uniq[unassigned] @ rep) > 1 - cos_eps
+            member[0] = True
+            in_group = np.isin(inverse, unassigned[member])
+            groups.append({'n': rep, 'files': [oriented[i] for i in valid_idx[in_group]]})
+            unassigned = unassigned[~member]
     
     # orientation 정보가 없는 파일들도 별도 스택으로 추가
-    files_without_orientation = [(f, ds) for f, ds in series_files 
-                                if not hasattr(ds, 'ImageOrientationPatient') or ds.ImageOrientationPatient is None]
     if files_without_orientation:
         groups.append({'n': None, 'files': files_without_orientation})
     
@@ -228,6 +329,120 @@ def group_stacks_by_orientation(series_files, cos_eps=1e-3):
     return stacks
 
 
+def slice_positions_along_normal(stack_files, n):
+    """
+    스택 전체의 슬라이스 위치 t = dot(n, IPP)를 벡터화하여 계산
+    IPP가 없는 슬라이스는 InstanceNumber로 대체
+    반환: (N,) float64 배열 (stack_files 순서)
+    """
+    ipps = [getattr(ds, 'ImagePositionPatient', None) for _, ds in stack_files]
+    has_ipp = np.array([bool(p) for p in ipps], dtype=bool)
+    t = np.array([getattr(ds, 'InstanceNumber', 0) or 0 for _, ds in stack_files], dtype=np.float64)
+    if has_ipp.any():
+        positions = np.array([p for p in ipps if p], dtype=np.float64).reshape(-1, 3)
+        t[has_ipp] = positions @ n
+    return t
+
+
+def _decode_slice(path):
+    """단일 DICOM 픽셀 디코딩 (pixel_array, RescaleSlope, RescaleIntercept)"""
+    ds = pydicom.dcmread(path)
+    slope = float(getattr(ds, 'RescaleSlope', 1) or 1)
+    intercept = float(getattr(ds, 'RescaleIntercept', 0) or 0)
+    return ds.pixel_array, slope, intercept
+
+
+def _read_compressed_frame(path):
+    """단일 프레임 DICOM의 압축 프레임 바이트와 (Rows, Columns, 부호, RescaleSlope, RescaleIntercept)"""
+    ds = pydicom.dcmread(path)
+    if str(ds.file_meta.TransferSyntaxUID) not in GPU_DECODE_TRANSFER_SYNTAXES:
+        raise ValueError(f"mixed transfer syntax in stack: {os.path.basename(path)}")
+    if int(getattr(ds, 'NumberOfFrames', 1) or 1) != 1:
+        raise ValueError(f"multi-frame DICOM not supported for GPU decoding: {os.path.basename(path)}")
+    try:
+        from pydicom.encaps import generate_frames  # pydicom>=3
+        frame = next(generate_frames(ds.PixelData, number_of_frames=1))
+    except ImportError:
+        from pydicom.encaps import generate_pixel_data_frame  # pydicom 2.x
+        frame = next(generate_pixel_data_frame(ds.PixelData, 1))
+    slope = float(getattr(ds, 'RescaleSlope', 1) or 1)
+    intercept = float(getattr(ds, 'RescaleIntercept', 0) or 0)
+    return frame, (int(ds.Rows), int(ds.Columns), int(getattr(ds, 'PixelRepresentation', 0)), slope, intercept)
+
+
+def _decode_slices_gpu(fnames, max_workers=8):
+    """
+    JPEG 2000/HTJ2K 슬라이스를 nvImageCodec으로 한 번에 GPU 배치 디코딩
+    반환: _decode_slice와 같은 (pixel_array, slope, intercept) 리스트
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(_read_compressed_frame, fnames))
+    
+    images = nvimgcodec.Decoder().decode([frame for frame, _ in frames])
+    decoded = []
+    for path, image, (_, (rows, columns, signed, slope, intercept)) in zip(fnames, images, frames):
+        if image is None:
+            raise RuntimeError(f"nvImageCodec failed to decode {os.path.basename(path)}")
+        pixels = np.asarray(image.cpu())
+        if pixels.size != rows * columns:
+            raise RuntimeError(f"Unexpected decoded shape {pixels.shape} for {os.path.basename(path)}")
+        pixels = pixels.reshape(rows, columns)
+        if signed and pixels.dtype.kind == 'u':
+            pixels = pixels.view(pixels.dtype.str.replace('u', 'i'))
+        decoded.append((pixels, slope, intercept))
+    return decoded
+
+
+def load_volume_from_datasets(sorted_files, n, max_workers=8, t=None):
+    """
+    정렬된 (path, ds) 스택에서 pydicom으로 픽셀을 직접 디코딩해 SimpleITK 볼륨 구성
+    ImageSeriesReader의 파일별 재파싱/재정렬을 생략하고, 기하정보는 이미 파싱된 헤더로 설정
+    (JPEG 계열 디코딩은 GIL을 해제하므로 스레드 풀로 병렬 디코딩)
+    JPEG 2000/HTJ2K 스택은 nvImageCodec이 있으면 GPU 배치 디코딩 (실패 시 CPU 디코딩)
+    t: sorted_files 순서의 슬라이스 위치 dot(n, IPP) - 호출자가 이미 계산했으면 재계산 생략
+    """
+    first_ds = sorted_files[0][1]
+    fnames = [f for f, _ in sorted_files]
+    
+    decoded = None
+    transfer_syntax = str(getattr(getattr(first_ds, 'file_meta', None), 'TransferSyntaxUID', ''))
+    if nvimgcodec is not None and transfer_syntax in GPU_DECODE_TRANSFER_SYNTAXES:
+        try:
+            decoded = _decode_slices_gpu(fnames, max_workers=max_workers)
+            logger.info(f"Decoded {len(decoded)} slice(s) on GPU (nvImageCodec)")
+        except Exception as e:
+            logger.warning(f"GPU DICOM decoding failed: {e}, falling back to CPU")
+            decoded = None
+    
+    if decoded is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            decoded = list(executor.map(_decode_slice, fnames))
+    
+    arr = np.stack([pixels for pixels, _, _ in decoded])
+    slopes = np.array([slope for _, slope, _ in decoded], dtype=np.float32)
+    intercepts = np.array([intercept for _, _, intercept in decoded], dtype=np.float32)
+    if np.any(slopes != 1) or np.any(intercepts != 0):
+        # 슬라이스별 Rescale 적용 (Philips 등은 슬라이스마다 다를 수 있음)
+        arr = arr.astype(np.float32)
+        arr *= slopes[:, None, None]
+        arr += intercepts[:, None, None]
+    
+    # 기하정보: spacing (x=열 간격, y=행 간격, z=슬라이스 간격), 원점=첫 슬라이스 IPP, 방향=[u, v, n]
+    iop = np.array(first_ds.ImageOrientationPatient, dtype=np.float64)
+    pixel_spacing = [float(x) for x in first_ds.PixelSpacing]
+    if t is None:
+        t = slice_positions_along_normal(sorted_files, n)
+    dz = float(np.median(np.diff(t))) if len(t) > 1 else 0.0
+    if dz <= 0:
+        dz = float(getattr(first_ds, 'SpacingBetweenSlices', None) or getattr(first_ds, 'SliceThickness', None) or 1.0)
+    
+    img = sitk.GetImageFromArray(arr)
+    img.SetSpacing((pixel_spacing[1], pixel_spacing[0], dz))
+    img.SetOrigin(tuple(float(x) for x in first_ds.ImagePositionPatient))
+    img.SetDirection(tuple(np.column_stack([iop[:3], iop[3:], n]).ravel()))
+    return img
+
+
 def read_volume_sorted(stack_files, keep_original_spacing=None):
     """
     스택 내 파일들을 법선 벡터 기준으로 정렬하고 볼륨을 읽음
@@ -252,20 +467,15 @@ def read_volume_sorted(stack_files, keep_original_spacing=None):
         img = reader.Execute()
         return img
     
-    def get_position_dot(ds):
-        if hasattr(ds, 'ImagePositionPatient') and ds.ImagePositionPatient:
-            pos = np.array(ds.ImagePositionPatient, dtype=float)
-            return np.dot(n, pos)
-        else:
-            return getattr(ds, 'InstanceNumber', 0)
-    
-    # IPP 기반 정렬
-    sorted_files = sorted(stack_files, key=lambda x: get_position_dot(x[1]))
+    # IPP 기반 정렬: 모든 슬라이스의 dot(n, IPP)를 한 번의 행렬곱으로 계산 후 argsort
+    t_all = slice_positions_along_normal(stack_files, n)
+    order = np.argsort(t_all, kind='stable')
+    sorted_files = [stack_files[i] for i in order]
+    t_sorted = t_all[order]
     
     # Outlier 제거: Δt 변동계수 > 10%
     if len(sorted_files) > 2:
-        t_values = [get_position_dot(ds) for _, ds in sorted_files]
-        deltas = np.diff(np.sort(t_values))
+        deltas = np.diff(t_sorted)
         median_delta = np.median(deltas)
         
         # 변동계수 계산
@@ -273,39 +483,38 @@ def read_volume_sorted(stack_files, keep_original_spacing=None):
             cv = np.std(deltas) / median_delta
             logger.info(f"Slice spacing CV: {cv:.3f} (median Δt={median_delta:.3f})")
         
-        # Outlier 판단: |Δt - median| > 20%
-        valid_files = [sorted_files[0]]  # 첫 번째는 항상 포함
-        removed_count = 0
+        # Outlier 판단: 직전 슬라이스와의 |Δt - median| > 20% (첫 번째는 항상 포함)
+        keep = np.ones(len(sorted_files), dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keep[1:] = (deltas > 0) & (np.abs(deltas - median_delta) / median_delta <= 0.2)
         
-        for i in range(1, len(sorted_files)):
-            prev_t = get_position_dot(sorted_files[i-1][1])
-            curr_t = get_position_dot(sorted_files[i][1])
-            delta = abs(curr_t - prev_t)
-            
-            if delta > 0 and abs(delta - median_delta) / median_delta <= 0.2:
-                valid_files.append(sorted_files[i])
-            else:
-                removed_count += 1
-                logger.warning(f"Removing outlier slice: Δt={delta:.3f} vs median={median_delta:.3f} ({os.path.basename(sorted_files[i][0])})")
+        removed = np.flatnonzero(~keep)
+        for i in removed:
+            logger.warning(f"Removing outlier slice: Δt={deltas[i - 1]:.3f} vs median={median_delta:.3f} ({os.path.basename(sorted_files[i][0])})")
         
-        if removed_count > 0:
-            logger.info(f"Removed {removed_count} outlier slice(s), keeping {len(valid_files)}")
-            sorted_files = valid_files
+        if removed.size > 0:
+            sorted_files = [sf for sf, k in zip(sorted_files, keep) if k]
+            t_sorted = t_sorted[keep]
+            logger.info(f"Removed {removed.size} outlier slice(s), keeping {len(sorted_files)}")
         else:
             logger.info(f"Sorted by dot(n, IPP), dz={median_delta:.3f}mm, removed_outliers=0")
     
-    fnames = [f for f, _ in sorted_files]
-    reader = sitk.ImageSeriesReader()
-    reader.SetFileNames(fnames)
-    img = reader.Execute()
+    try:
+        img = load_volume_from_datasets(sorted_files, n, t=t_sorted)
+    except Exception as e:
+        # 압축 전송구문 디코더 미설치 등 → ImageSeriesReader로 폴백
+        logger.warning(f"Direct pydicom volume load failed: {e}, falling back to ImageSeriesReader")
+        fnames = [f for f, _ in sorted_files]
+        reader = sitk.ImageSeriesReader()
+        reader.SetFileNames(fnames)
+        img = reader.Execute()
     
     original_spacing = img.GetSpacing()
     original_size = img.GetSize()
     
     # 유효 z-spacing 계산 (outlier 제거 후)
     if len(sorted_files) > 1:
-        t_values_final = [get_position_dot(ds) for _, ds in sorted_files]
-        deltas_final = np.diff(sorted(t_values_final))
+        deltas_final = np.diff(t_sorted)
         dz_mm = np.median(deltas_final) if len(deltas_final) > 0 else original_spacing[2]
         logger.info(f"Original image size: {original_size}, spacing: {original_spacing}, dz={dz_mm:.3f}mm")
     else:
@@ -402,12 +611,12 @@ def read_volume_sorted(stack_files, keep_original_spacing=None):
 
 def create_body_mask(img_iso: sitk.Image):
     """
-    CurvatureFlow 기반 바디마스크 생성
+    재귀 가우시안 기반 바디마스크 생성
     부드럽게 → Otsu → 가장 큰 연결요소만 남김
     """
-    logger.info("Creating body mask using CurvatureFlow...")
-    # CurvatureFlow로 부드럽게 (경계 보존하면서 노이즈 제거)
-    smoothed = sitk.CurvatureFlow(img_iso, timeStep=0.125, numberOfIterations=5)
+    logger.info("Creating body mask using recursive Gaussian smoothing...")
+    # Otsu 안정화용 노이즈 제거: 축별 IIR 1패스 (CurvatureFlow 5회 반복 PDE 대비 O(N))
+    smoothed = sitk.SmoothingRecursiveGaussian(img_iso, sigma=1.0)
     
     # Otsu 임계값으로 바디 마스크 생성
     try:
@@ -415,8 +624,9 @@ def create_body_mask(img_iso: sitk.Image):
         logger.info(f"Otsu body mask created")
     except Exception as e:
         logger.warning(f"Otsu threshold failed: {e}, using median threshold")
-        arr = sitk.GetArrayFromImage(smoothed)
-        median_threshold = np.median(arr)
+        # 4×4×4 격자 부분 샘플(1/64, 복사 없는 strided 뷰)의 중앙값으로 임계값 추정
+        arr = sitk.GetArrayViewFromImage(smoothed)
+        median_threshold = float(np.median(arr[::4, ::4, ::4]))
         body_mask = sitk.BinaryThreshold(smoothed, median_threshold, 1e9, 1, 0)
     
     # Morphological closing으로 구멍 메우기
@@ -427,8 +637,11 @@ def create_body_mask(img_iso: sitk.Image):
     relabeled = sitk.RelabelComponent(cc, sortByObjectSize=True)
     body_mask = sitk.BinaryThreshold(relabeled, 1, 1)
     
-    body_mask_arr = sitk.GetArrayFromImage(body_mask).astype(bool)
-    logger.info(f"Body mask: {np.sum(body_mask_arr)} / {body_mask_arr.size} pixels ({100*np.sum(body_mask_arr)/body_mask_arr.size:.1f}%)")
+    # BinaryThreshold 결과는 이미 uint8 (0/1) - bool 변환 복사 없이 그대로 사용
+    # 반환 배열은 body_mask 이미지보다 오래 살아남으므로 뷰(GetArrayViewFromImage)가 아닌 복사본이어야 함
+    body_mask_arr = sitk.GetArrayFromImage(body_mask)
+    body_voxels = int(np.count_nonzero(body_mask_arr))
+    logger.info(f"Body mask: {body_voxels} / {body_mask_arr.size} pixels ({100*body_voxels/body_mask_arr.size:.1f}%)")
     
     return body_mask_arr
 
@@ -437,80 +650,82 @@ def create_bone_mask(img_iso: sitk.Image, body_mask):
     """
     경사도(gradient) 기반 뼈 마스크 생성
     MRI에서 뼈는 검은 테두리(피질골)로 보이므로 경계강도 기반으로 추출
+    임계값 계산만 NumPy, 임계/연결요소/closing은 SimpleITK 필터 체인으로 처리
     """
     logger.info("Creating bone mask using gradient magnitude...")
     
     # Gradient magnitude 계산 (경계강도)
     gradient = sitk.GradientMagnitudeRecursiveGaussian(img_iso, sigma=1.0)
-    gradient_arr = sitk.GetArrayFromImage(gradient)
-    
-    # 바디 안쪽 영역만 고려
-    gradient_in_body = gradient_arr.copy()
-    gradient_in_body[~body_mask] = 0
     
-    # 상위 15% 경계만 선택 (뼈 경계는 강한 경사도를 가짐)
+    # 바디 안쪽 영역의 경사도만 고려 (뷰로 읽어 전체 볼륨 복사 회피, 0/1 uint8 마스크는 bool 뷰로 재해석)
+    body = body_mask.view(bool) if body_mask.dtype == np.uint8 else body_mask.astype(bool, copy=False)
+    gradient_in_body = sitk.GetArrayViewFromImage(gradient)[body]
     non_zero_gradients = gradient_in_body[gradient_in_body > 0]
+    
+    body_img = sitk.GetImageFromArray(body_mask.astype(np.uint8, copy=False))
+    body_img.CopyInformation(gradient)
+    
     if len(non_zero_gradients) > 0:
-        threshold_percentile = np.percentile(non_zero_gradients, 85)
+        # 상위 15% 경계만 선택 (뼈 경계는 강한 경사도를 가짐)
+        # np.percentile(85)과 같은 선형 보간값을 전체 정렬 대신 O(N) 부분 분할로 계산
+        rank = 0.85 * (non_zero_gradients.size - 1)
+        lo = int(rank)
+        hi = min(lo + 1, non_zero_gradients.size - 1)
+        non_zero_gradients.partition([lo, hi])
+        g_lo, g_hi = float(non_zero_gradients[lo]), float(non_zero_gradients[hi])
+        threshold_percentile = g_lo + (rank - lo) * (g_hi - g_lo)
         logger.info(f"Gradient threshold (85th percentile): {threshold_percentile:.3f}")
         
-        bone_mask = (gradient_in_body >= threshold_percentile) & body_mask
+        bone_img = sitk.And(sitk.GreaterEqual(gradient, threshold_percentile), body_img)
     else:
         logger.warning("No gradients found in body mask, using fallback")
-        bone_mask = body_mask.copy()
+        bone_img = body_img
     
     # 3D 형태학으로 다듬기
-    # 작은 파편 제거 (5000 voxel 이하)
-    bone_mask = morphology.remove_small_objects(bone_mask, min_size=5000)
+    # 작은 파편 제거 (5000 voxel 미만, face 연결 기준)
+    relabeled = sitk.RelabelComponent(sitk.ConnectedComponent(bone_img), minimumObjectSize=5000)
+    bone_img = sitk.NotEqual(relabeled, 0)
     # Closing으로 경계 부드럽게
-    bone_mask = morphology.binary_closing(bone_mask, morphology.ball(2))
+    bone_img = sitk.BinaryMorphologicalClosing(bone_img, [2, 2, 2], sitk.sitkBall)
     
-    bone_voxels = np.sum(bone_mask)
+    bone_mask = sitk.GetArrayFromImage(bone_img)
+    bone_voxels = int(np.count_nonzero(bone_mask))
     logger.info(f"Bone mask: {bone_voxels} / {bone_mask.size} pixels ({100*bone_voxels/bone_mask.size:.1f}%)")
     
-    return bone_mask.astype(np.float32)
+    return bone_mask
 
 
 def preprocess_mri_for_surface(img_iso: sitk.Image, use_n4_bias_correction=True, mask_type='body'):
     """
     MRI 이미지 전처리: N4 bias correction → 바디마스크 → 경사도 기반 뼈 마스크
     mask_type: 'body' (바디 전체) 또는 'bone' (경사도 기반 뼈만)
+    반환: uint8 (0/1) 마스크 (float32 대비 1/4 메모리)
     """
+    # 입력을 Float32로 한 번만 통일: N4뿐 아니라 가우시안/경사도 필터도 Float32로 계산
+    # (int16/float64 입력이 중간 단계에서 float64로 승격되어 메모리 대역폭이 두 배가 되는 것 방지)
+    pixel_id = img_iso.GetPixelID()
+    if pixel_id != sitk.sitkFloat32:
+        try:
+            pixel_type_str = sitk.GetPixelIDTypeAsString(pixel_id)
+            logger.info(f"Converting pixel type from {pixel_type_str} to Float32 for preprocessing")
+        except AttributeError:
+            logger.info(f"Converting pixel type (ID: {pixel_id}) to Float32 for preprocessing")
+        img_iso = sitk.Cast(img_iso, sitk.sitkFloat32)
+    img_for_processing = img_iso
+    
     # 0) N4 Bias Field Correction (선택적)
     if use_n4_bias_correction:
         try:
             logger.info("Applying N4 bias field correction...")
-            
-            # N4 필터는 float 타입을 요구하므로 픽셀 타입 변환
-            pixel_id = img_iso.GetPixelID()
-            if pixel_id != sitk.sitkFloat32:
-                try:
-                    pixel_type_str = sitk.GetPixelIDTypeAsString(pixel_id)
-                    logger.info(f"Converting pixel type from {pixel_type_str} to Float32 for N4 bias correction")
-                except AttributeError:
-                    logger.info(f"Converting pixel type (ID: {pixel_id}) to Float32 for N4 bias correction")
-                img_for_n4 = sitk.Cast(img_iso, sitk.sitkFloat32)
-            else:
-                img_for_n4 = img_iso
-            
             # Otsu로 거친 바디마스크 생성 (N4에 필요)
-            rough_body = sitk.OtsuThreshold(img_for_n4, 0, 1, 200)
-            corrector = sitk.N4BiasFieldCorrectionImageFilter()
-            corrector.SetMaximumNumberOfIterations([50, 50, 50, 50])  # 4 levels
-            img_bias_corrected = corrector.Execute(img_for_n4, rough_body)
+            rough_body = sitk.OtsuThreshold(img_iso, 0, 1, 200)
+            # 4배 축소 영상에서 bias field 추정 후 전해상도에 적용
+            img_for_processing = n4_correct_shrunk(img_iso, rough_body)
             logger.info("N4 bias correction completed")
-            img_for_processing = img_bias_corrected
         except Exception as e:
             logger.warning(f"N4 bias correction failed: {e}, proceeding without correction")
-            # float로 변환된 이미지가 있으면 사용, 없으면 원본 사용
-            if 'img_for_n4' in locals():
-                img_for_processing = img_for_n4
-            else:
-                img_for_processing = img_iso
-    else:
-        img_for_processing = img_iso
     
-    # 1) 바디마스크 생성 (CurvatureFlow 기반)
+    # 1) 바디마스크 생성 (재귀 가우시안 + Otsu)
     body_mask = create_body_mask(img_for_processing)
     
     # 2) 마스크 타입에 따라 선택
@@ -518,12 +733,26 @@ def preprocess_mri_for_surface(img_iso: sitk.Image, use_n4_bias_correction=True,
         # 경사도 기반 뼈 마스크
         final_mask = create_bone_mask(img_for_processing, body_mask)
     else:
-        # 바디 마스크만 사용
-        final_mask = body_mask.astype(np.float32)
+        # 바디 마스크만 사용 (이미 uint8)
+        final_mask = body_mask
     
     return final_mask
 
 
+def mask_bounding_box(mask):
+    """3D 마스크의 (z,y,x) 포함 경계 바운딩박스 (bbox_min, bbox_max), 비어 있으면 None"""
+    occupied_z = np.flatnonzero(np.any(mask, axis=(1, 2)))
+    if occupied_z.size == 0:
+        return None
+    # y/x 범위는 점유된 z 슬라이스 구간만 OR 리덕션 (빈 슬랩은 다시 읽지 않음)
+    plane_yx = np.any(mask[occupied_z[0]:occupied_z[-1] + 1], axis=0)
+    occupied_y = np.flatnonzero(plane_yx.any(axis=1))
+    occupied_x = np.flatnonzero(plane_yx.any(axis=0))
+    bbox_min = np.array([occupied_z[0], occupied_y[0], occupied_x[0]])
+    bbox_max = np.array([occupied_z[-1], occupied_y[-1], occupied_x[-1]])
+    return bbox_min, bbox_max
+
+
 def mesh_from_image_with_coordinate_transform(img_iso, binary_mask=None, level=0.5, step_size=2):
     """
     이미지에서 메쉬를 생성하고, 월드 좌표(LPS→Three.js)로 변환
@@ -541,37 +770,37 @@ def mesh_from_image_with_coordinate_transform(img_iso, binary_mask=None, level=0
     
     # 2) Marching cubes (spacing은 여기서 적용)
     logger.info("Starting marching cubes algorithm...")
-    verts_zyx, faces, normals, values = measure.marching_cubes(
-        binary_mask.astype(np.float32),
+    # uint8 마스크를 그대로 전달 (level=0.5는 0/1 사이 등치면 = 항상 에지 중점)
+    verts_zyx, faces, normals = extract_isosurface(
+        binary_mask,
         level=level,
-        spacing=spacing[::-1],  # (x,y,z) → (z,y,x)
+        spacing_zyx=spacing[::-1],  # (x,y,z) → (z,y,x)
         step_size=step_size
     )
     logger.info(f"Marching cubes generated {len(verts_zyx)} vertices and {len(faces)} faces")
     
-    # 3) (z,y,x) → (x,y,z)로 변환
-    verts_xyz = verts_zyx[:, [2, 1, 0]]
-    
-    # 4) ⚠️ 중요: spacing은 이미 marching_cubes에서 적용되었으므로 verts_xyz는 이미 mm 단위!
-    # 따라서 추가 곱 없이 direction & origin만 적용 → LPS 좌표 (mm)
-    p_lps = (direction @ verts_xyz.T).T + origin
-    
-    # 5) LPS → Three.js 좌표 변환 + mm → m 변환
-    # Three.js 좌표: x = R = -L, y = S, z = P
-    # 단위: mm → m (1/1000)
-    p_three = np.column_stack([
-        -p_lps[:, 0] * 0.001,  # R = -L, mm → m
-        p_lps[:, 2] * 0.001,   # S, mm → m
-        p_lps[:, 1] * 0.001    # z = P, mm → m
-    ])
+    # 3~5) (z,y,x) 인덱스 순서 → (x,y,z) → direction/origin 적용(LPS, mm) → Three.js 좌표(m)를
+    # 하나의 아핀 변환으로 합쳐 정점 배열에 한 번만 적용 (중간 전체 크기 사본 없음)
+    # ⚠️ spacing은 이미 marching_cubes에서 적용되었으므로 verts_zyx는 이미 mm 단위 → 추가 곱 없음
+    # Three.js 좌표: x = R = -L, y = S, z = P, 단위 mm → m (1/1000)
+    zyx_to_xyz = np.array([[0, 0, 1], [0, 1, 0], [1, 0, 0]], dtype=np.float64)
+    lps_to_three = 0.001 * np.array([[-1, 0, 0], [0, 0, 1], [0, 1, 0]], dtype=np.float64)
+    linear = lps_to_three @ direction @ zyx_to_xyz
+    offset = lps_to_three @ origin
+    p_three = verts_zyx @ linear.T + offset
+    
+    # LPS 범위는 Three.js 범위에서 역산 (L = -x, P = z, S = y)
+    three_min, three_max = p_three.min(axis=0), p_three.max(axis=0)
+    lps_min = np.array([-three_max[0], three_min[2], three_min[1]]) * 1000
+    lps_max = np.array([-three_min[0], three_max[2], three_max[1]]) * 1000
     
     logger.info(f"Converted vertices from LPS to Three.js coordinates")
-    logger.info(f"LPS range: x=[{p_lps[:, 0].min():.1f}, {p_lps[:, 0].max():.1f}], "
-                f"y=[{p_lps[:, 1].min():.1f}, {p_lps[:, 1].max():.1f}], "
-                f"z=[{p_lps[:, 2].min():.1f}, {p_lps[:, 2].max():.1f}]")
-    logger.info(f"Three.js range: x=[{p_three[:, 0].min():.1f}, {p_three[:, 0].max():.1f}], "
-                f"y=[{p_three[:, 1].min():.1f}, {p_three[:, 1].max():.1f}], "
-                f"z=[{p_three[:, 2].min():.1f}, {p_three[:, 2].max():.1f}]")
+    logger.info(f"LPS range: x=[{lps_min[0]:.1f}, {lps_max[0]:.1f}], "
+                f"y=[{lps_min[1]:.1f}, {lps_max[1]:.1f}], "
+                f"z=[{lps_min[2]:.1f}, {lps_max[2]:.1f}]")
+    logger.info(f"Three.js range: x=[{three_min[0]:.1f}, {three_max[0]:.1f}], "
+                f"y=[{three_min[1]:.1f}, {three_max[1]:.1f}], "
+                f"z=[{three_min[2]:.1f}, {three_max[2]:.1f}]")
     
     # 6) Trimesh 메쉬 생성
     mesh = trimesh.Trimesh(vertices=p_three, faces=faces, vertex_normals=normals, process=False)
@@ -588,16 +817,11 @@ def mesh_from_image_with_coordinate_transform(img_iso, binary_mask=None, level=0
     # 8) 작은 연결요소 제거 (파편 제거)
     try:
         logger.info("Removing small connected components...")
-        comps = mesh.split(only_watertight=False)
-        # 체적이 있는 컴포넌트 우선 (watertight 메쉬)
-        comps_with_volume = [c for c in comps if c.is_volume and c.volume > 0]
-        if comps_with_volume:
-            # 가장 큰 컴포넌트 선택
-            mesh = max(comps_with_volume, key=lambda c: c.volume)
-            logger.info(f"Kept largest component with volume: {mesh.volume:.1f}")
+        # 체적이 있는 컴포넌트(닫힌 메쉬) 우선, 없으면 면 수 기준으로 가장 큰 컴포넌트 선택
+        mesh, volume = largest_component(mesh)
+        if volume is not None:
+            logger.info(f"Kept largest component with volume: {volume:.1f}")
         else:
-            # 체적이 없으면 면 수 기준으로 선택
-            mesh = max(comps, key=lambda c: len(c.faces))
             logger.info(f"Kept largest component by face count: {len(mesh.faces)} faces")
         
         logger.info(f"After component filtering: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
@@ -606,21 +830,148 @@ def mesh_from_image_with_coordinate_transform(img_iso, binary_mask=None, level=0
     
     # 9) 메시 스무딩/간소화 (후처리)
     try:
-        logger.info("Applying Laplacian smoothing...")
-        trimesh.smoothing.filter_laplacian(mesh, iterations=5, lamb=0.5)
-        
+        # Taubin(λ/μ) 스무딩: 수축이 없어 Laplacian의 반복별 체적 보정(mass_properties)이 불필요
         # Decimation 30-60% (step_size에 따라 조정)
-        decimation_ratio = 0.5 if step_size <= 2 else 0.4  # step_size가 클수록 더 간소화
-        target_faces = int(mesh.faces.shape[0] * decimation_ratio)
-        logger.info(f"Simplifying mesh to {target_faces} faces ({decimation_ratio*100:.0f}% of original)...")
-        mesh = mesh.simplify_quadratic_decimation(target_faces)
-        logger.info(f"Simplified mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
+        # 작은 메쉬(10만 면 미만)는 간소화 비용이 GLB 절감보다 크므로 생략, 목표 면수 하한 5만
+        # (스무딩은 면 수를 바꾸지 않으므로 목표 면수를 먼저 정하고 두 단계를 한 번에 처리)
+        n_faces = mesh.faces.shape[0]
+        target_faces = None
+        if n_faces >= 100_000:
+            decimation_ratio = 0.5 if step_size <= 2 else 0.4  # step_size가 클수록 더 간소화
+            # 공통 면 수 상한(MESH_TARGET_FACES, v2 ReconOptions.target_faces 기본값)도 적용
+            target_faces = min(max(50_000, int(n_faces * decimation_ratio)), MESH_TARGET_FACES)
+            logger.info(f"Applying Taubin smoothing and simplifying mesh to {target_faces} faces "
+                        f"({100*target_faces/n_faces:.0f}% of original)...")
+        else:
+            logger.info(f"Applying Taubin smoothing, skipping simplification for small mesh ({n_faces} faces)")
+        mesh = smooth_and_simplify(mesh, iterations=5, target_faces=target_faces)
+        logger.info(f"Post-processed mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
     except Exception as e:
         logger.warning(f"Mesh smoothing/simplification failed: {e}")
     
     return mesh
 
 
+def compress_glb_with_cli(uncompressed_glb: bytes) -> bytes:
+    """gltf-transform으로 Draco 압축: 상주 워커 → CLI 순 (실패/타임아웃/미설치 시 입력 GLB 그대로 반환)"""
+    global _draco_cli_available
+    if not gltf_transform_worker.available and not _draco_cli_available:
+        logger.info("gltf-transform is not available, using uncompressed GLB")
+        return uncompressed_glb
+    
+    with tempfile.NamedTemporaryFile(suffix='.glb', dir=GLB_SCRATCH_DIR, delete=False) as tmp_input:
+        tmp_input.write(uncompressed_glb)
+        tmp_input_path = tmp_input.name
+    
+    tmp_output_path = tmp_input_path.replace('.glb', '_draco.glb')
+    
+    # 1) 상주 Node 워커 (기동/모듈 로드 비용 없음)
+    if gltf_transform_worker.available:
+        try:
+            gltf_transform_worker.compress(tmp_input_path, tmp_output_path)
+            with open(tmp_output_path, 'rb') as f:
+                gltf_data = f.read()
+            compression_ratio = (1 - len(gltf_data) / len(uncompressed_glb)) * 100
+            logger.info(f"Draco compressed GLB size (worker): {len(gltf_data) / (1024 * 1024):.2f} MB "
+                        f"({compression_ratio:.1f}% reduction)")
+            os.unlink(tmp_input_path)
+            return gltf_data
+        except Exception as e:
+            logger.warning(f"gltf-transform worker failed: {e}, falling back to CLI")
+        finally:
+            if os.path.exists(tmp_output_path):
+                os.unlink(tmp_output_path)
+    
+    # 2) 일회성 CLI 실행
+    if not _draco_cli_available:
+        os.unlink(tmp_input_path)
+        return uncompressed_glb
+    
+    if GLTF_TRANSFORM_BIN:
+        draco_cmd = [GLTF_TRANSFORM_BIN, 'compress']
+    else:
+        draco_cmd = ['npx', '-y', '@gltf-transform/cli', 'compress']
+    
+    try:
+        result = subprocess.run(
+            draco_cmd + [
+                tmp_input_path,
+                tmp_output_path,
+                '--draco-compression-level', '10',
+                '--draco-quantize-position', '14',
+                '--draco-quantize-normal', '10',
+                '--draco-quantize-color', '8',
+                '--draco-quantize-texcoord', '12'
+            ],
+            capture_output=True,
+            text=True,
+            timeout=300
+        )
+        
+        if result.returncode == 0 and os.path.exists(tmp_output_path):
+            with open(tmp_output_path, 'rb') as f:
+                gltf_data = f.read()
+            
+            compressed_size_mb = len(gltf_data) / (1024 * 1024)
+            compression_ratio = (1 - len(gltf_data) / len(uncompressed_glb)) * 100
+            logger.info(f"Draco compressed GLB size: {compressed_size_mb:.2f} MB ({compression_ratio:.1f}% reduction)")
+            return gltf_data
+        
+        logger.warning(f"Draco compression failed: {result.stderr}, using uncompressed GLB")
+        if not GLTF_TRANSFORM_BIN:
+            # npx 경로 실패는 대개 패키지 해석 실패 → 이후 작업에서 다시 시도하지 않음
+            _draco_cli_available = False
+            
+    except subprocess.TimeoutExpired:
+        logger.warning("Draco compression timeout, using uncompressed GLB")
+    except FileNotFoundError:
+        logger.warning("gltf-transform not found, using uncompressed GLB")
+        _draco_cli_available = False
+    except Exception as e:
+        logger.warning(f"Draco compression error: {e}, using uncompressed GLB")
+    finally:
+        if os.path.exists(tmp_input_path):
+            os.unlink(tmp_input_path)
+        if os.path.exists(tmp_output_path):
+            os.unlink(tmp_output_path)
+    
+    return uncompressed_glb
+
+
+def export_and_upload_stl(mesh: trimesh.Trimesh, stl_obj_name: str):
+    """바이너리 STL을 스풀 파일에 기록 후 파트 단위 스트리밍 업로드 (큰 STL은 디스크로 넘김)"""
+    with tempfile.SpooledTemporaryFile(max_size=STL_SPOOL_MAX_BYTES) as stl_file:
+        stl_size = write_binary_stl(mesh, stl_file)
+        stl_file.seek(0)
+        logger.info(f"STL file size: {stl_size / (1024 * 1024):.2f} MB")
+        storage_client.upload_fileobj(stl_obj_name, stl_file, "application/octet-stream", length=stl_size)
+
+
+def export_and_upload_glb(mesh: trimesh.Trimesh, gltf_obj_name: str):
+    """GLB 내보내기 (정점 14비트 양자화 + Draco 압축) 후 업로드"""
+    # KHR_mesh_quantization: Draco는 정수 좌표를 그대로 인코딩, 뷰어는 int16 속성 사용
+    try:
+        try:
+            # 인프로세스 Draco (Node 기동/임시 파일 왕복 없음)
+            gltf_data = export_draco_glb(mesh, position_bits=14)
+            logger.info(f"Draco GLB encoded in-process: {len(gltf_data) / (1024 * 1024):.2f} MB")
+        except Exception as e:
+            logger.info(f"In-process Draco unavailable ({e}), using gltf-transform CLI")
+            uncompressed_glb = export_quantized_glb(mesh, position_bits=14)
+            uncompressed_size_mb = len(uncompressed_glb) / (1024 * 1024)
+            logger.info(f"Quantized GLB size: {uncompressed_size_mb:.2f} MB")
+            gltf_data = compress_glb_with_cli(uncompressed_glb)
+        
+        gltf_size_mb = len(gltf_data) / (1024 * 1024)
+        logger.info(f"Final GLB file size: {gltf_size_mb:.2f} MB ({len(mesh.faces)} faces)")
+        
+    except Exception as e:
+        logger.error(f"Failed to export GLB: {e}", exc_info=True)
+        raise
+    
+    storage_client.upload_file(gltf_obj_name, gltf_data, "model/gltf-binary")
+
+
 def process_dicom_to_mesh(reconstruction: Reconstruction, db: Session) -> dict:
     """
     DICOM 파일을 읽어서 3D 메쉬로 변환
@@ -641,6 +992,191 @@ def process_dicom_to_mesh(reconstruction: Reconstruction, db: Session) -> dict:
     )
 
 
+def _volume_cache_key(series_uid: str, stack_files: list):
+    """SeriesInstanceUID + 정렬된 SOPInstanceUID 해시로 캐시 키 결정 (UID 누락 시 None)
+
+    dicom_url(오브젝트 키)은 재구성마다 달라지므로, 같은 스택을 다시 올려도
+    적중하도록 DICOM 내용 기준으로 키를 만든다.
+    """
+    sop_uids = [getattr(ds, 'SOPInstanceUID', None) for _, ds in stack_files]
+    if not series_uid or not all(sop_uids):
+        # HEADER_TAGS에서 태그가 빠지면 캐시가 조용히 꺼지므로 로그로 드러냄
+        logger.warning(f"Volume cache disabled: {sum(1 for u in sop_uids if not u)}/{len(sop_uids)} "
+                       f"header(s) without SOPInstanceUID")
+        return None
+    h = hashlib.blake2b(str(series_uid).encode(), digest_size=16)
+    for uid in sorted(str(u) for u in sop_uids):
+        h.update(b'\0' + uid.encode())
+    return h.hexdigest()
+
+
+def _volume_cache_path(cache_key: str) -> Path:
+    """캐시 키로 캐시 경로 결정 (비압축 MHA: 쓰기/읽기 모두 gzip 비용 없음)"""
+    return Path(settings.VOLUME_CACHE_DIR) / cache_key / 'vol.mha'
+
+
+def load_cached_volume(cache_key: str):
+    """같은 스택 재처리 시 디코딩된 볼륨을 로컬 캐시에서 로드 (없으면 None)"""
+    cache_file = _volume_cache_path(cache_key)
+    if not cache_file.exists():
+        return None
+    try:
+        img = sitk.ReadImage(str(cache_file))
+        os.utime(cache_file.parent)  # LRU 정리용 최근 사용 시각 갱신
+        logger.info(f"Volume cache hit: {cache_file.parent.name} (size={img.GetSize()})")
+        return img
+    except Exception as e:
+        logger.warning(f"Failed to read cached volume {cache_file}: {e}")
+        shutil.rmtree(cache_file.parent, ignore_errors=True)
+        return None
+
+
+def store_cached_volume(cache_key: str, img: sitk.Image):
+    """디코딩된 볼륨을 캐시에 저장하고 오래된 항목 정리 (실패해도 파이프라인은 계속)"""
+    cache_file = _volume_cache_path(cache_key)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓴 뒤 rename: 동시 작업이 쓰다 만 파일을 읽지 않도록
+        tmp_file = cache_file.with_name(f"vol.{os.getpid()}.tmp.mha")
+        sitk.WriteImage(img, str(tmp_file))
+        os.replace(tmp_file, cache_file)
+        
+        # LRU 정리: 최근 사용 순으로 VOLUME_CACHE_MAX_ENTRIES개만 유지
+        entries = sorted(
+            (d for d in Path(settings.VOLUME_CACHE_DIR).iterdir() if d.is_dir()),
+            key=lambda d: d.stat().st_mtime,
+            reverse=True
+        )
+        for stale in entries[settings.VOLUME_CACHE_MAX_ENTRIES:]:
+            shutil.rmtree(stale, ignore_errors=True)
+    except Exception as e:
+        logger.warning(f"Failed to cache volume {cache_file}: {e}")
+
+
+def load_best_stack_volume(dicom_files: list) -> tuple:
+    """DICOM 다운로드 → 시리즈/스택 선택 → 정렬된 볼륨 읽기
+
+    Returns:
+        (img_iso, None) 성공 시, (None, error_message) 실패 시
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 동시 스트리밍 다운로드 (객체별 왕복 지연 중첩, 파일 전체를 메모리에 올리지 않고 디스크로 바로 기록)
+        logger.info(f"Downloading {len(dicom_files)} DICOM file(s)...")
+        dicom_paths = storage_client.download_files(dicom_files, temp_dir)
+        if len(dicom_paths) < len(dicom_files):
+            logger.warning(f"Failed to download {len(dicom_files) - len(dicom_paths)} DICOM file(s)")
+        
+        if not dicom_paths:
+            return None, "Failed to download DICOM files"
+        
+        # Step 1: SeriesInstanceUID별로 그룹화
+        by_series = group_by_series_uid(dicom_paths)
+        
+        if not by_series:
+            return None, "No valid series found (missing SeriesInstanceUID)"
+        
+        # QC 게이트 1: 여러 SeriesInstanceUID가 있는 경우 가장 큰 그룹 선택
+        if len(by_series) > 1:
+            series_uids = list(by_series.keys())
+            series_sizes = {uid: len(files) for uid, files in by_series.items()}
+            
+            # 가장 큰 시리즈 선택
+            selected_series_uid = max(series_sizes, key=series_sizes.get)
+            selected_size = series_sizes[selected_series_uid]
+            total_files = sum(series_sizes.values())
+            
+            logger.warning(f"Mixed series detected ({len(by_series)} different SeriesInstanceUIDs). "
+                         f"Selecting largest series: {selected_series_uid[:32]}... "
+                         f"({selected_size}/{total_files} files, {100*selected_size/total_files:.1f}%)")
+            logger.warning(f"Other series will be ignored. Series UIDs: {[uid[:16]+'...' for uid in series_uids[:5]]}...")
+            
+            # 사용자에게 경고 메시지 제공 (하지만 계속 진행)
+            # return {"status": "error", ...} 대신 경고만 로그하고 진행
+        else:
+            selected_series_uid = list(by_series.keys())[0]
+        
+        # 선택된 Series 사용
+        series_files = by_series[selected_series_uid]
+        
+        # QC 게이트 2: Geometry 일관성 검증
+        is_valid, geometry_errors = validate_series_geometry(series_files)
+        if not is_valid:
+            return None, (f"Inconsistent geometry in series {selected_series_uid[:16]}...: "
+                          f"{', '.join(geometry_errors[:3])}")
+        
+        # Step 2: 같은 Series 내에서 orientation별로 스택 분류 (보조)
+        stacks = group_stacks_by_orientation(series_files)
+        
+        if not stacks:
+            return None, "No valid stacks found after orientation grouping"
+        
+        # Step 3: 스택 점수화 및 최적 스택 선택
+        scored_stacks = []
+        for stack in stacks:
+            score, metadata = score_stack_for_3d(stack)
+            scored_stacks.append((score, stack, metadata))
+        
+        # 점수순 정렬 (높은 점수 = 3D/얇은 슬라이스 우선)
+        scored_stacks.sort(key=lambda x: x[0], reverse=True)
+        
+        best_score, best_stack, best_metadata = scored_stacks[0]
+        
+        # 메타데이터 추출
+        first_ds = best_stack[0][1]
+        rows = getattr(first_ds, 'Rows', None)
+        columns = getattr(first_ds, 'Columns', None)
+        pixel_spacing = getattr(first_ds, 'PixelSpacing', None)
+        
+        logger.info(f"Selected SeriesInstanceUID={selected_series_uid[:32]}... (files={len(best_stack)}, spacing={pixel_spacing}, matrix={rows}x{columns})")
+        logger.info(f"Stack selection results:")
+        for idx, (score, stack, metadata) in enumerate(scored_stacks[:3]):  # 상위 3개만 로그
+            logger.info(f"  [{idx+1}] Score={score}, Files={len(stack)}, "
+                      f"SliceThickness={metadata.get('slice_thickness')}, "
+                      f"Is3D={metadata.get('is_3d')}, Reasons={metadata.get('reason')}")
+        
+        logger.info(f"Selected stack: {len(best_stack)} file(s), score={best_score}")
+        logger.info(f"Selected stack metadata: {best_metadata}")
+        
+        # 정렬 품질 검증
+        if hasattr(best_stack[0][1], 'ImagePositionPatient') and best_stack[0][1].ImagePositionPatient:
+            first_ds = best_stack[0][1]
+            u = np.array(first_ds.ImageOrientationPatient[:3], dtype=float)
+            v = np.array(first_ds.ImageOrientationPatient[3:], dtype=float)
+            n = np.cross(u, v)
+            n /= (np.linalg.norm(n) + 1e-12)
+            
+            # IPP가 있는 슬라이스만 (N,3)으로 모아 한 번의 행렬곱으로 법선 방향 위치 계산
+            ipps = [ds.ImagePositionPatient for _, ds in best_stack
+                    if hasattr(ds, 'ImagePositionPatient') and ds.ImagePositionPatient]
+            
+            if len(ipps) > 1:
+                positions = np.asarray(ipps, dtype=np.float64).reshape(-1, 3) @ n
+                positions.sort()  # 제자리 정렬 (np.sort 사본 없음)
+                deltas = np.diff(positions)
+                median_delta = np.median(deltas)
+                std_delta = deltas.std()
+                non_increasing = int(np.count_nonzero(deltas <= 0))
+                
+                logger.info(f"Slice sorting quality: median Δt={median_delta:.3f}, std={std_delta:.3f}, "
+                          f"non-increasing={non_increasing}")
+                
+                if non_increasing > len(positions) * 0.1:  # 10% 이상이 비증가면 경고
+                    logger.warning(f"Many non-increasing slice positions ({non_increasing}/{len(positions)})")
+        
+        # 같은 스택이면 디코딩/리샘플 결과를 캐시에서 재사용
+        cache_key = _volume_cache_key(selected_series_uid, best_stack)
+        if cache_key is not None:
+            img_iso = load_cached_volume(cache_key)
+            if img_iso is not None:
+                return img_iso, None
+        
+        # 볼륨 읽기 및 표준화 (자동 판단: 비등방성이 크면 리샘플)
+        img_iso = read_volume_sorted(best_stack, keep_original_spacing=None)
+        if cache_key is not None:
+            store_cached_volume(cache_key, img_iso)
+        return img_iso, None
+
+
 def process_dicom_to_mesh_legacy(reconstruction: Reconstruction, db: Session) -> dict:
     """DICOM 파일을 읽어서 3D 메쉬로 변환 (기존 파이프라인 - 레거시)"""
     try:
@@ -650,258 +1186,74 @@ def process_dicom_to_mesh_legacy(reconstruction: Reconstruction, db: Session) ->
         if not dicom_files:
             return {"status": "error", "message": "No DICOM files"}
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            dicom_paths = []
-            for dicom_obj in dicom_files:
-                logger.info(f"Downloading DICOM file: {dicom_obj}")
-                file_data = storage_client.get_file(dicom_obj)
-                if not file_data:
-                    logger.warning(f"Failed to download file: {dicom_obj}")
-                    continue
-                
-                file_path = os.path.join(temp_dir, os.path.basename(dicom_obj))
-                with open(file_path, 'wb') as f:
-                    f.write(file_data)
-                dicom_paths.append(file_path)
-            
-            if not dicom_paths:
-                return {"status": "error", "message": "Failed to download DICOM files"}
-            
-            # Step 1: SeriesInstanceUID별로 그룹화
-            by_series = group_by_series_uid(dicom_paths)
-            
-            if not by_series:
-                return {"status": "error", "message": "No valid series found (missing SeriesInstanceUID)"}
+        img_iso, error_msg = load_best_stack_volume(dicom_files)
+        if img_iso is None:
+            return {"status": "error", "message": error_msg}
+        
+        # 이미지 크기 검증 (배열 변환 없이 SimpleITK 크기로 확인, (z,y,x) 순서)
+        image_shape = img_iso.GetSize()[::-1]
+        if len(image_shape) < 3 or any(dim < 2 for dim in image_shape):
+            error_msg = f"DICOM image is too small for 3D reconstruction. Shape: {image_shape}."
+            logger.error(error_msg)
+            return {"status": "error", "message": error_msg}
+        
+        # 메쉬 생성 (전처리, ROI 크롭, 좌표 변환 포함)
+        try:
+            # 메쉬 생성 전 ROI 크롭 적용 (이미지 자체 크롭)
+            binary_mask = preprocess_mri_for_surface(img_iso)
             
-            # QC 게이트 1: 여러 SeriesInstanceUID가 있는 경우 가장 큰 그룹 선택
-            if len(by_series) > 1:
-                series_uids = list(by_series.keys())
-                series_sizes = {uid: len(files) for uid, files in by_series.items()}
-                
-                # 가장 큰 시리즈 선택
-                selected_series_uid = max(series_sizes, key=series_sizes.get)
-                selected_size = series_sizes[selected_series_uid]
-                total_files = sum(series_sizes.values())
+            # 마스크 바운딩박스로 이미지 크롭 (배경 슬랩 제거)
+            bbox = mask_bounding_box(binary_mask)
+            if bbox is not None:
+                bbox_min, bbox_max = bbox
+                # 15mm 여백을 축별 복셀 수로 환산해 스칼라 연산으로 클램프 (bbox는 (z,y,x), spacing은 (x,y,z))
+                spacing_zyx = img_iso.GetSpacing()[::-1]
+                crop_min = [max(0, int(lo - 15.0 / sp)) for lo, sp in zip(bbox_min, spacing_zyx)]
+                crop_max = [min(dim, int(hi + 15.0 / sp))
+                            for hi, sp, dim in zip(bbox_max, spacing_zyx, image_shape)]
                 
-                logger.warning(f"Mixed series detected ({len(by_series)} different SeriesInstanceUIDs). "
-                             f"Selecting largest series: {selected_series_uid[:32]}... "
-                             f"({selected_size}/{total_files} files, {100*selected_size/total_files:.1f}%)")
-                logger.warning(f"Other series will be ignored. Series UIDs: {[uid[:16]+'...' for uid in series_uids[:5]]}...")
+                # 마스크는 (z,y,x) 슬라이스 뷰로 크롭
+                mask_cropped = binary_mask[tuple(slice(lo, hi) for lo, hi in zip(crop_min, crop_max))]
                 
-                # 사용자에게 경고 메시지 제공 (하지만 계속 진행)
-                # return {"status": "error", ...} 대신 경고만 로그하고 진행
-            else:
-                selected_series_uid = list(by_series.keys())[0]
-            
-            # 선택된 Series 사용
-            series_files = by_series[selected_series_uid]
-            
-            # QC 게이트 2: Geometry 일관성 검증
-            is_valid, geometry_errors = validate_series_geometry(series_files)
-            if not is_valid:
-                return {
-                    "status": "error",
-                    "message": f"Inconsistent geometry in series {selected_series_uid[:16]}...: {', '.join(geometry_errors[:3])}"
-                }
-            
-            # Step 2: 같은 Series 내에서 orientation별로 스택 분류 (보조)
-            stacks = group_stacks_by_orientation(series_files)
-            
-            if not stacks:
-                return {"status": "error", "message": "No valid stacks found after orientation grouping"}
-            
-            # Step 3: 스택 점수화 및 최적 스택 선택
-            scored_stacks = []
-            for stack in stacks:
-                score, metadata = score_stack_for_3d(stack)
-                scored_stacks.append((score, stack, metadata))
-            
-            # 점수순 정렬 (높은 점수 = 3D/얇은 슬라이스 우선)
-            scored_stacks.sort(key=lambda x: x[0], reverse=True)
-            
-            best_score, best_stack, best_metadata = scored_stacks[0]
-            
-            # 메타데이터 추출
-            first_ds = best_stack[0][1]
-            rows = getattr(first_ds, 'Rows', None)
-            columns = getattr(first_ds, 'Columns', None)
-            pixel_spacing = getattr(first_ds, 'PixelSpacing', None)
-            
-            logger.info(f"Selected SeriesInstanceUID={selected_series_uid[:32]}... (files={len(best_stack)}, spacing={pixel_spacing}, matrix={rows}x{columns})")
-            logger.info(f"Stack selection results:")
-            for idx, (score, stack, metadata) in enumerate(scored_stacks[:3]):  # 상위 3개만 로그
-                logger.info(f"  [{idx+1}] Score={score}, Files={len(stack)}, "
-                          f"SliceThickness={metadata.get('slice_thickness')}, "
-                          f"Is3D={metadata.get('is_3d')}, Reasons={metadata.get('reason')}")
-            
-            logger.info(f"Selected stack: {len(best_stack)} file(s), score={best_score}")
-            logger.info(f"Selected stack metadata: {best_metadata}")
-            
-            # 정렬 품질 검증
-            if hasattr(best_stack[0][1], 'ImagePositionPatient') and best_stack[0][1].ImagePositionPatient:
-                first_ds = best_stack[0][1]
-                u = np.array(first_ds.ImageOrientationPatient[:3], dtype=float)
-                v = np.array(first_ds.ImageOrientationPatient[3:], dtype=float)
-                n = np.cross(u, v)
-                n /= (np.linalg.norm(n) + 1e-12)
+                # 이미지는 ITK에서 직접 크롭 ((x,y,z) 인덱스/크기, 원점은 direction까지 반영해 ITK가 계산,
+                # spacing/direction 보존 → NumPy 경유 이미지 재생성/메타데이터 재설정 불필요)
+                img_cropped = sitk.RegionOfInterest(
+                    img_iso,
+                    size=[hi - lo for lo, hi in zip(crop_min, crop_max)][::-1],
+                    index=crop_min[::-1]
+                )
                 
-                positions = []
-                for f, ds in best_stack:
-                    if hasattr(ds, 'ImagePositionPatient') and ds.ImagePositionPatient:
-                        pos = np.array(ds.ImagePositionPatient, dtype=float)
-                        t = np.dot(n, pos)
-                        positions.append(t)
+                logger.info(f"Image cropped: {image_shape} → {mask_cropped.shape}, new origin: {img_cropped.GetOrigin()}")
                 
-                if len(positions) > 1:
-                    positions = np.array(positions)
-                    deltas = np.diff(np.sort(positions))
-                    median_delta = np.median(deltas)
-                    std_delta = np.std(deltas)
-                    non_increasing = np.sum(deltas <= 0)
-                    
-                    logger.info(f"Slice sorting quality: median Δt={median_delta:.3f}, std={std_delta:.3f}, "
-                              f"non-increasing={non_increasing}")
-                    
-                    if non_increasing > len(positions) * 0.1:  # 10% 이상이 비증가면 경고
-                        logger.warning(f"Many non-increasing slice positions ({non_increasing}/{len(positions)})")
+                # 크롭된 이미지로 메쉬 생성 (bone 마스크 사용)
+                mesh = mesh_from_image_with_coordinate_transform(img_cropped, binary_mask=mask_cropped, level=0.5, step_size=3)
+            else:
+                logger.warning("No mask found for cropping, using full image")
+                mesh = mesh_from_image_with_coordinate_transform(img_iso, binary_mask=binary_mask, level=0.5, step_size=3)
             
-            # 볼륨 읽기 및 표준화 (자동 판단: 비등방성이 크면 리샘플)
-            img_iso = read_volume_sorted(best_stack, keep_original_spacing=None)
+            stl_obj_name = f"mesh/{reconstruction.id}/mesh.stl"
+            gltf_obj_name = f"mesh/{reconstruction.id}/mesh.glb"
             
-            # 이미지 크기 검증
-            image_array = sitk.GetArrayFromImage(img_iso)
-            if len(image_array.shape) < 3 or any(dim < 2 for dim in image_array.shape):
-                error_msg = f"DICOM image is too small for 3D reconstruction. Shape: {image_array.shape}."
-                logger.error(error_msg)
-                return {"status": "error", "message": error_msg}
+            # STL/GLB는 읽기 전용 mesh만 공유하므로 동시에 내보내기+업로드
+            # 지연 계산 캐시(면/정점 법선)는 스레드 간 경합이 없도록 미리 채움
+            mesh.face_normals
+            mesh.vertex_normals
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                stl_future = executor.submit(export_and_upload_stl, mesh, stl_obj_name)
+                glb_future = executor.submit(export_and_upload_glb, mesh, gltf_obj_name)
+                stl_future.result()
+                glb_future.result()
             
-            # 메쉬 생성 (전처리, ROI 크롭, 좌표 변환 포함)
-            try:
-                # 메쉬 생성 전 ROI 크롭 적용 (이미지 자체 크롭)
-                image_array = sitk.GetArrayFromImage(img_iso)
-                binary_mask = preprocess_mri_for_surface(img_iso)
-                
-                # 마스크 바운딩박스로 이미지 크롭 (배경 슬랩 제거)
-                coords = np.argwhere(binary_mask > 0)
-                if len(coords) > 0:
-                    bbox_min = coords.min(axis=0)
-                    bbox_max = coords.max(axis=0)
-                    margin_voxels = np.array([15, 15, 15]) / np.array(img_iso.GetSpacing())
-                    crop_min = np.maximum(0, (bbox_min - margin_voxels).astype(int))
-                    crop_max = np.minimum(np.array(image_array.shape), (bbox_max + margin_voxels).astype(int))
-                    
-                    # 이미지와 마스크 크롭
-                    image_cropped = image_array[crop_min[0]:crop_max[0], 
-                                                crop_min[1]:crop_max[1], 
-                                                crop_min[2]:crop_max[2]]
-                    mask_cropped = binary_mask[crop_min[0]:crop_max[0], 
-                                              crop_min[1]:crop_max[1], 
-                                              crop_min[2]:crop_max[2]]
-                    
-                    # SimpleITK Image 재생성 (원점 보정)
-                    origin = np.array(img_iso.GetOrigin())
-                    spacing = np.array(img_iso.GetSpacing())
-                    new_origin = origin + (crop_min * spacing)
-                    
-                    img_cropped = sitk.GetImageFromArray(image_cropped)
-                    img_cropped.SetSpacing(img_iso.GetSpacing())
-                    img_cropped.SetOrigin(new_origin)
-                    img_cropped.SetDirection(img_iso.GetDirection())
-                    
-                    logger.info(f"Image cropped: {image_array.shape} → {image_cropped.shape}, new origin: {new_origin}")
-                    
-                    # 크롭된 이미지로 메쉬 생성 (bone 마스크 사용)
-                    mesh = mesh_from_image_with_coordinate_transform(img_cropped, binary_mask=mask_cropped, level=0.5, step_size=3)
-                else:
-                    logger.warning("No mask found for cropping, using full image")
-                    mesh = mesh_from_image_with_coordinate_transform(img_iso, binary_mask=binary_mask, level=0.5, step_size=3)
-                
-                # STL 내보내기
-                stl_buffer = io.BytesIO()
-                mesh.export(stl_buffer, file_type='stl')
-                stl_data = stl_buffer.getvalue()
-                stl_size_mb = len(stl_data) / (1024 * 1024)
-                logger.info(f"STL file size: {stl_size_mb:.2f} MB")
-                stl_obj_name = f"mesh/{reconstruction.id}/mesh.stl"
-                storage_client.upload_file(stl_obj_name, stl_data, "application/octet-stream")
-                
-                # GLTF 내보내기 (Draco 압축 적용)
-                try:
-                    gltf_buffer = io.BytesIO()
-                    mesh.export(gltf_buffer, file_type='glb')
-                    uncompressed_glb = gltf_buffer.getvalue()
-                    uncompressed_size_mb = len(uncompressed_glb) / (1024 * 1024)
-                    logger.info(f"Uncompressed GLB size: {uncompressed_size_mb:.2f} MB")
-                    
-                    with tempfile.NamedTemporaryFile(suffix='.glb', delete=False) as tmp_input:
-                        tmp_input.write(uncompressed_glb)
-                        tmp_input_path = tmp_input.name
-                    
-                    tmp_output_path = tmp_input_path.replace('.glb', '_draco.glb')
-                    
-                    try:
-                        result = subprocess.run(
-                            [
-                                'npx', '-y', '@gltf-transform/cli', 'compress',
-                                tmp_input_path,
-                                tmp_output_path,
-                                '--draco-compression-level', '10',
-                                '--draco-quantize-position', '14',
-                                '--draco-quantize-normal', '10',
-                                '--draco-quantize-color', '8',
-                                '--draco-quantize-texcoord', '12'
-                            ],
-                            capture_output=True,
-                            text=True,
-                            timeout=300
-                        )
-                        
-                        if result.returncode == 0 and os.path.exists(tmp_output_path):
-                            with open(tmp_output_path, 'rb') as f:
-                                gltf_data = f.read()
-                            
-                            compressed_size_mb = len(gltf_data) / (1024 * 1024)
-                            compression_ratio = (1 - len(gltf_data) / len(uncompressed_glb)) * 100
-                            logger.info(f"Draco compressed GLB size: {compressed_size_mb:.2f} MB ({compression_ratio:.1f}% reduction)")
-                        else:
-                            logger.warning(f"Draco compression failed: {result.stderr}, using uncompressed GLB")
-                            gltf_data = uncompressed_glb
-                            
-                    except subprocess.TimeoutExpired:
-                        logger.warning("Draco compression timeout, using uncompressed GLB")
-                        gltf_data = uncompressed_glb
-                    except FileNotFoundError:
-                        logger.warning("gltf-transform not found, using uncompressed GLB")
-                        gltf_data = uncompressed_glb
-                    except Exception as e:
-                        logger.warning(f"Draco compression error: {e}, using uncompressed GLB")
-                        gltf_data = uncompressed_glb
-                    finally:
-                        if os.path.exists(tmp_input_path):
-                            os.unlink(tmp_input_path)
-                        if os.path.exists(tmp_output_path):
-                            os.unlink(tmp_output_path)
-                    
-                    gltf_size_mb = len(gltf_data) / (1024 * 1024)
-                    logger.info(f"Final GLB file size: {gltf_size_mb:.2f} MB ({len(mesh.faces)} faces)")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to export GLB: {e}", exc_info=True)
-                    raise
-                    
-                gltf_obj_name = f"mesh/{reconstruction.id}/mesh.glb"
-                storage_client.upload_file(gltf_obj_name, gltf_data, "model/gltf-binary")
-                
-                return {
-                    "status": "success",
-                    "stl_url": stl_obj_name,
-                    "gltf_url": gltf_obj_name
-                }
+            return {
+                "status": "success",
+                "stl_url": stl_obj_name,
+                "gltf_url": gltf_obj_name
+            }
 
-            except Exception as e:
-                error_msg = f"Mesh generation failed: {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                return {"status": "error", "message": error_msg}
+        except Exception as e:
+            error_msg = f"Mesh generation failed: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return {"status": "error", "message": error_msg}
         
     except Exception as e:
         error_msg = f"Processing failed: {str(e)}"
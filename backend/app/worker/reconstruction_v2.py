@@ -8,6 +8,7 @@ from pathlib import Path
 import tempfile
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
 
 from app.models.reconstruction import Reconstruction
@@ -17,6 +18,67 @@ from app.processing.io import list_series, load_series_by_files
 
 logger = logging.getLogger(__name__)
 
+# 헤더 스캔 동시성 (pydicom 파싱 자체는 GIL을 잡으므로 I/O 중첩 이득 위주)
+HEADER_READ_WORKERS = 8
+
+# 헤더 스캔에서 파싱할 태그 (시리즈 그룹화/로컬라이저 제외/시리즈 메타데이터에서 읽는 것만)
+PROBE_TAGS = ['SeriesInstanceUID', 'ImageType', 'PixelSpacing', 'SliceThickness', 'SpacingBetweenSlices']
+
+
+def _probe_series_header(dicom_path: str):
+    """
+    DICOM 헤더에서 PROBE_TAGS만 읽어 (SeriesInstanceUID, Dataset) 반환
+    UID 없음/LOCALIZER/SCOUT/읽기 실패 시 (None, None)
+    """
+    import pydicom
+    try:
+        # 필요한 태그만 파싱 (나머지 요소/시퀀스는 건너뜀)
+        ds = pydicom.dcmread(dicom_path, stop_before_pixels=True, specific_tags=PROBE_TAGS)
+        series_uid = getattr(ds, 'SeriesInstanceUID', None)
+        
+        if not series_uid:
+            return None, None
+        
+        # LOCALIZER/SCOUT 제외
+        image_type = str(getattr(ds, 'ImageType', '') or '').upper()
+        if 'LOCALIZER' in image_type or 'SCOUT' in image_type:
+            return None, None
+        
+        return series_uid, ds
+    except Exception as e:
+        logger.warning(f"Failed to read DICOM metadata from {dicom_path}: {e}")
+        return None, None
+
+
+def link_into(src: str, dst) -> None:
+    """
+    파일을 복사 없이 dst에 배치: 하드 링크 → (다른 파일시스템 등으로 실패 시) 심볼릭 링크
+    SimpleITK/GDCM과 pydicom 모두 링크를 일반 파일처럼 읽음
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        os.symlink(os.path.abspath(src), dst)
+
+
+def group_paths_by_key(paths: list, keys: list) -> dict:
+    """
+    키(None 제외)별 경로 그룹화 (np.unique 한 번 + 안정 정렬 분할)
+    그룹은 키가 처음 나온 순서, 그룹 내 경로는 입력 순서 유지
+    """
+    valid = np.array([k is not None for k in keys], dtype=bool)
+    if not valid.any():
+        return {}
+    
+    path_arr = np.asarray(paths, dtype=object)[valid]
+    key_arr = np.asarray([k for k in keys if k is not None])
+    uniq, first_idx, inverse = np.unique(key_arr, return_index=True, return_inverse=True)
+    
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(uniq)))[:-1]
+    chunks = np.split(path_arr[order], bounds)
+    return {str(uniq[g]): chunks[g].tolist() for g in np.argsort(first_idx)}
+
 
 def process_dicom_to_mesh_v2(
     reconstruction: Reconstruction, 
@@ -56,48 +118,31 @@ def process_dicom_to_mesh_v2(
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
             
-            # 1) MinIO에서 DICOM 파일 다운로드
-            dicom_paths = []
-            for dicom_obj in dicom_files:
-                logger.info(f"Downloading DICOM file: {dicom_obj}")
-                file_data = storage_client.get_file(dicom_obj)
-                if not file_data:
-                    logger.warning(f"Failed to download file: {dicom_obj}")
-                    continue
-                
-                file_path = temp_path / os.path.basename(dicom_obj)
-                with open(file_path, 'wb') as f:
-                    f.write(file_data)
-                dicom_paths.append(str(file_path))
+            # 1) MinIO에서 DICOM 파일 동시 다운로드 (응답 스트림을 디스크로 바로 기록, 일시 오류는 재시도)
+            # 반환 경로는 입력 순서 유지, 실패한 파일은 제외
+            logger.info(f"Downloading {len(dicom_files)} DICOM file(s)...")
+            dicom_paths = storage_client.download_files(dicom_files, temp_dir)
+            if len(dicom_paths) < len(dicom_files):
+                logger.warning(f"Failed to download {len(dicom_files) - len(dicom_paths)} file(s)")
             
             if not dicom_paths:
                 return {"status": "error", "message": "Failed to download DICOM files"}
             
             # 2) SeriesInstanceUID별로 그룹화하여 여러 시리즈 디렉터리 생성
             # 다평면 처리를 위해 각 시리즈를 별도 디렉터리로 분리
-            import pydicom
-            from collections import defaultdict
+            # 헤더 읽기는 파일별로 독립적 → 스레드 풀로 병렬 (파일 I/O 대기 중첩), 집계는 메인 스레드에서 입력 순서대로
+            with ThreadPoolExecutor(max_workers=HEADER_READ_WORKERS) as pool:
+                probes = list(pool.map(_probe_series_header, dicom_paths))
+            series_uids = [uid for uid, _ in probes]
             
-            series_groups = defaultdict(list)
-            for dicom_path in dicom_paths:
-                try:
-                    ds = pydicom.dcmread(dicom_path, stop_before_pixels=True)
-                    series_uid = getattr(ds, 'SeriesInstanceUID', None)
-                    
-                    if not series_uid:
-                        continue
-                    
-                    # LOCALIZER/SCOUT 제외
-                    image_type = str(getattr(ds, 'ImageType', '') or '').upper()
-                    if 'LOCALIZER' in image_type or 'SCOUT' in image_type:
-                        continue
-                    
-                    series_groups[series_uid].append(dicom_path)
-                except Exception as e:
-                    logger.warning(f"Failed to read DICOM metadata from {dicom_path}: {e}")
-                    continue
+            series_groups = group_paths_by_key(dicom_paths, series_uids)
             
-            series_groups = dict(series_groups)
+            # 시리즈별 첫 파일 헤더 (메타데이터 수집 시 파일을 다시 읽지 않도록 보관)
+            first_headers = {}
+            for uid, ds in probes:
+                if uid is not None and uid not in first_headers:
+                    first_headers[uid] = ds
+            del probes
             
             if not series_groups:
                 return {"status": "error", "message": "No valid series found"}
@@ -116,12 +161,11 @@ def process_dicom_to_mesh_v2(
                 use_multi_plane = False
             
             # 시리즈 메타데이터 수집 (z-spacing 우선 선택용)
-            import pydicom
             series_meta = {}
             for uid, files in series_groups.items():
                 try:
-                    # 첫 번째 파일로 메타데이터 확인
-                    ds = pydicom.dcmread(files[0], stop_before_pixels=True)
+                    # 첫 번째 파일의 헤더로 메타데이터 확인 (헤더 스캔에서 이미 파싱됨)
+                    ds = first_headers[uid]
                     spacing = getattr(ds, 'PixelSpacing', [1.0, 1.0])
                     if hasattr(ds, 'SliceThickness') and ds.SliceThickness:
                         z_spacing = float(ds.SliceThickness)
@@ -149,28 +193,29 @@ def process_dicom_to_mesh_v2(
                     logger.warning(f"FORCE_SERIES_UID set. Using {force_uid} regardless of heuristics.")
                     return force_uid
                 
-                cand = []
+                # 한 번의 순회로 기준별 최선 후보를 갱신 (정렬/재스캔 없음)
+                # 간격 기준: (z 오름차순, 슬라이스 수 내림차순) 최소, 동률이면 먼저 나온 시리즈
+                # 폴백: 슬라이스 수 최대, 동률이면 z가 작은 시리즈
+                best_fine = best_medium = largest = None
                 for uid, files in series_groups.items():
                     meta = series_meta.get(uid, {})
                     z = meta.get('z_spacing', 9.9)
                     n = meta.get('slices', len(files))
-                    cand.append((uid, n, z))
-                
-                cand.sort(key=lambda x: (x[2], -x[1]))  # z 오름차순, 슬라이스수 내림차순
-                
-                def pick(min_z, min_n):
-                    for uid, n, z in cand:
-                        if z <= min_z and n >= min_n:
-                            return uid, n, z
-                    return None
+                    key = (z, -n)
+                    if z <= 2.2 and n >= 40 and (best_fine is None or key < best_fine[0]):
+                        best_fine = (key, uid, n, z)
+                    if z <= 3.5 and n >= 30 and (best_medium is None or key < best_medium[0]):
+                        best_medium = (key, uid, n, z)
+                    if largest is None or (-n, z) < largest[0]:
+                        largest = ((-n, z), uid, n, z)
                 
-                picked = pick(2.2, 40) or pick(3.5, 30)
+                picked = best_fine or best_medium
                 if picked:
-                    uid, n, z = picked
+                    _, uid, n, z = picked
                     logger.info(f"Selected by spacing: uid={uid[:16]}..., slices={n}, z={z:.2f}mm")
                     return uid
                 
-                uid, n, z = max(cand, key=lambda t: t[1])
+                _, uid, n, z = largest
                 logger.warning(f"No fine spacing series; fallback to largest: uid={uid[:16]}..., slices={n}, z={z:.2f}mm")
                 return uid
             
@@ -185,10 +230,9 @@ def process_dicom_to_mesh_v2(
                     series_dir = temp_path / f"series_{sid[:8]}"
                     series_dir.mkdir(parents=True, exist_ok=True)
                     
-                    import shutil
                     for f in files:
-                        # 심볼릭 링크 또는 복사 (SimpleITK는 파일 경로 필요)
-                        shutil.copy(f, series_dir / os.path.basename(f))
+                        # 복사 대신 링크 (SimpleITK는 디렉터리/파일 경로만 필요)
+                        link_into(f, series_dir / os.path.basename(f))
                     
                     series_dirs.append(series_dir)
                 
@@ -221,9 +265,8 @@ def process_dicom_to_mesh_v2(
                 series_dir = temp_path / "series_single"
                 series_dir.mkdir(parents=True, exist_ok=True)
                 
-                import shutil
                 for f in selected_files:
-                    shutil.copy(f, series_dir / os.path.basename(f))
+                    link_into(f, series_dir / os.path.basename(f))
                 
                 opts = ReconOptions(
                     target_spacing=target_spacing,
@@ -239,18 +282,15 @@ def process_dicom_to_mesh_v2(
             gltf_path = result['gltf']
             stl_path = result['stl']
             
+            # 파이프라인이 디스크에 쓴 파일을 그대로 파트 단위 스트리밍 업로드 (bytes로 읽어 올리지 않음)
             # GLB 업로드
-            with open(gltf_path, 'rb') as f:
-                gltf_data = f.read()
             gltf_obj_name = f"mesh/{reconstruction.id}/mesh.glb"
-            storage_client.upload_file(gltf_obj_name, gltf_data, "model/gltf-binary")
+            storage_client.upload_path(gltf_obj_name, gltf_path, "model/gltf-binary")
             logger.info(f"Uploaded GLB: {gltf_obj_name}")
             
             # STL 업로드
-            with open(stl_path, 'rb') as f:
-                stl_data = f.read()
             stl_obj_name = f"mesh/{reconstruction.id}/mesh.stl"
-            storage_client.upload_file(stl_obj_name, stl_data, "application/octet-stream")
+            storage_client.upload_path(stl_obj_name, stl_path, "application/octet-stream")
             logger.info(f"Uploaded STL: {stl_obj_name}")
             
             # 로그 출력
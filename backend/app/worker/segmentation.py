@@ -2,14 +2,21 @@ from app.models.reconstruction import Reconstruction
 from app.models.segment import Segment
 from app.utils.storage import storage_client
 from app.core.config import settings
+from app.processing.mesh import export_quantized_glb, extract_isosurface, simplify_mesh
 from sqlalchemy.orm import Session
 import SimpleITK as sitk
 import numpy as np
-from skimage import measure
 import trimesh
-import io
 import tempfile
 import os
+import gc
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 세그멘테이션 메쉬 Quadric 간소화: 면 수가 SEG_DECIMATE_MIN_FACES 이상이면 비율만큼 축소
+SEG_DECIMATION_RATIO = float(os.getenv("SEG_DECIMATION_RATIO", "0.2"))
+SEG_DECIMATE_MIN_FACES = 50_000
 
 
 def process_ai_segmentation(reconstruction: Reconstruction, segment: Segment, label: str, db: Session) -> dict:
@@ -27,22 +34,16 @@ def process_ai_segmentation(reconstruction: Reconstruction, segment: Segment, la
         reader = sitk.ImageSeriesReader()
         
         with tempfile.TemporaryDirectory() as temp_dir:
-            dicom_paths = []
-            for dicom_obj in dicom_files:
-                file_data = storage_client.get_file(dicom_obj)
-                if not file_data:
-                    continue
-                file_path = os.path.join(temp_dir, os.path.basename(dicom_obj))
-                with open(file_path, 'wb') as f:
-                    f.write(file_data)
-                dicom_paths.append(file_path)
+            # 동시 스트리밍 다운로드 (파일 전체를 메모리에 올리지 않고 디스크로 바로 기록)
+            dicom_paths = storage_client.download_files(dicom_files, temp_dir)
             
             if not dicom_paths:
                 return {"status": "error", "message": "Failed to download DICOM files"}
             
             reader.SetFileNames(dicom_paths)
             image = reader.Execute()
-            image_array = sitk.GetArrayFromImage(image)
+            # 임계값 비교에만 쓰이므로 SimpleITK 버퍼를 복사 없이 읽기 전용 뷰로 참조 (RSS 2배 방지)
+            image_array = sitk.GetArrayViewFromImage(image)
         
         # TODO: MONAI 모델을 사용한 세그멘테이션
         # 현재는 간단한 임계값 기반 세그멘테이션 사용
@@ -56,12 +57,12 @@ def process_ai_segmentation(reconstruction: Reconstruction, segment: Segment, la
         }
         
         threshold = threshold_map.get(label.lower(), 50)
-        mask_array = (image_array > threshold).astype(np.uint8)
+        # ITK 필터로 비교 + uint8 (0/1) 변환을 한 패스에 처리 (네이티브 멀티스레드, bool 중간 배열 없음)
+        # 결과가 바로 원본 geometry를 가진 이미지이므로 GetImageFromArray 복사/CopyInformation 불필요
+        mask_image = sitk.Greater(image, float(threshold))
         
         # 마스크를 저장
         mask_obj_name = f"segmentation/{reconstruction.id}/{segment.id}/mask.nii.gz"
-        mask_image = sitk.GetImageFromArray(mask_array)
-        mask_image.CopyInformation(image)
         
         with tempfile.NamedTemporaryFile(suffix='.nii.gz', delete=False) as tmp_file:
             sitk.WriteImage(mask_image, tmp_file.name)
@@ -71,20 +72,38 @@ def process_ai_segmentation(reconstruction: Reconstruction, segment: Segment, la
         
         storage_client.upload_file(mask_obj_name, mask_data, "application/octet-stream")
         
+        # 마칭큐브 전 피크 메모리 축소: 저장이 끝난 마스크 이미지/압축 바이트와 리더 해제
+        # (원본 SimpleITK 버퍼는 image_array 뷰가 참조하는 등치면 입력이므로 유지)
+        spacing_zyx = tuple(image.GetSpacing()[::-1])
+        del mask_image, mask_data, reader
+        gc.collect()
+        
         # 마스크에서 메쉬 생성
         try:
-            verts, faces, normals, values = measure.marching_cubes(
-                mask_array.astype(np.float32),
-                level=0.5,
-                spacing=image.GetSpacing()[::-1]
+            # CUDA + PyTorch3D가 있으면 GPU 마칭큐브, 없으면 Flying Edges/skimage
+            # 이진 마스크 대신 원본 영상에서 임계값 등치면을 직접 추출
+            # (같은 경계면을 서브복셀 보간으로 찾으므로 계단 아티팩트 없음, 마스크는 저장용으로만 사용)
+            verts, faces, normals = extract_isosurface(
+                image_array,
+                level=float(threshold),
+                spacing_zyx=spacing_zyx
             )
             
-            mesh = trimesh.Trimesh(vertices=verts, faces=faces, vertex_normals=normals)
+            # 추출기 출력은 이미 정점 공유 메쉬 + 법선 포함 → 병합/재계산(process) 생략
+            mesh = trimesh.Trimesh(vertices=verts, faces=faces, vertex_normals=normals, process=False)
+            
+            # Draco/업로드/브라우저 파싱 비용은 면 수에 비례 → 큰 메쉬는 Quadric 간소화
+            n_faces = len(mesh.faces)
+            if n_faces >= SEG_DECIMATE_MIN_FACES and SEG_DECIMATION_RATIO < 1.0:
+                try:
+                    mesh = simplify_mesh(mesh, int(n_faces * SEG_DECIMATION_RATIO))
+                    logger.info(f"Segmentation mesh simplified: {n_faces} -> {len(mesh.faces)} faces")
+                except Exception as e:
+                    logger.warning(f"Segmentation mesh simplification failed: {e}, using full mesh")
             
-            # 세그멘테이션 메쉬 저장
-            mesh_buffer = io.BytesIO()
-            mesh.export(mesh_buffer, file_type='glb')
-            mesh_data = mesh_buffer.getvalue()
+            # 세그멘테이션 메쉬 저장 (정점 14비트 uint16 + 법선 int8, KHR_mesh_quantization)
+            # trimesh는 정점을 float64로만 보관하므로 업로드 직전 정수 격자로 양자화
+            mesh_data = export_quantized_glb(mesh, position_bits=14)
             mesh_obj_name = f"segmentation/{reconstruction.id}/{segment.id}/mesh.glb"
             storage_client.upload_file(mesh_obj_name, mesh_data, "model/gltf-binary")
             
@@ -1,14 +1,21 @@
 from celery import Celery
+from celery.signals import worker_process_init
 import sys
 import os
+import logging
 # PYTHONPATH에 /app/backend가 있으므로 backend.app로 접근
 sys.path.insert(0, '/app/backend')
 from app.core.config import settings
-from app.core.database import SessionLocal
+from sqlalchemy.orm import scoped_session
+from app.core.database import SessionLocal, engine
 from app.models.reconstruction import Reconstruction, ReconstructionStatus
 from app.models.segment import Segment
 from app.worker.reconstruction import process_dicom_to_mesh
 from app.worker.segmentation import process_ai_segmentation
+from app.worker.gltf_transform_worker import gltf_transform_worker
+from app.processing.mesh import HAS_DRACOPY
+
+logger = logging.getLogger(__name__)
 
 celery_app = Celery(
     "mri_worker",
@@ -21,11 +28,38 @@ celery_app.conf.task_routes = {
     'app.worker.tasks.process_segmentation': {'queue': 'segmentation'},
 }
 
+# 워커 프로세스(스레드)당 하나의 세션을 재사용, 태스크 종료 시 remove()로 연결을 풀에 반납
+TaskSession = scoped_session(SessionLocal)
+
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """
+    fork 직후 부모에게서 물려받은 커넥션 풀을 버리고 자식 전용 풀로 시작
+    (부모 소켓을 공유하면 동시 사용 시 프로토콜이 꼬임, close=False로 부모 연결은 건드리지 않음)
+    """
+    engine.dispose(close=False)
+
+
+@worker_process_init.connect
+def warm_gltf_transform_worker(**kwargs):
+    """
+    워커 자식 프로세스 기동 시 gltf-transform 상주 Node 워커를 미리 띄움
+    (첫 작업에서 Node 기동 + 모듈/WASM 로드 비용을 내지 않도록, fork 이후라 파이프는 자식 전용)
+    인프로세스 Draco(DracoPy)가 있으면 사이드카는 폴백 전용이므로 필요할 때 지연 기동
+    """
+    if HAS_DRACOPY:
+        return
+    try:
+        gltf_transform_worker.start()
+    except Exception as e:
+        logger.warning(f"gltf-transform worker warm-up failed: {e}, will use CLI fallback")
+
 
 @celery_app.task(name="app.worker.tasks.process_reconstruction", bind=True, max_retries=0)
 def process_reconstruction(self, reconstruction_id: str):
     """DICOM 파일을 3D 메쉬로 변환하는 태스크"""
-    db = SessionLocal()
+    db = TaskSession()
     reconstruction = None
     try:
         reconstruction = db.query(Reconstruction).filter(
@@ -65,13 +99,13 @@ def process_reconstruction(self, reconstruction_id: str):
                 print(f"Failed to update reconstruction status: {db_error}")
         return {"status": "error", "message": str(e)}
     finally:
-        db.close()
+        TaskSession.remove()
 
 
 @celery_app.task(name="app.worker.tasks.process_segmentation")
 def process_segmentation(reconstruction_id: str, segment_id: str, label: str):
     """AI 세그멘테이션 태스크"""
-    db = SessionLocal()
+    db = TaskSession()
     try:
         reconstruction = db.query(Reconstruction).filter(
             Reconstruction.id == reconstruction_id
@@ -97,5 +131,5 @@ def process_segmentation(reconstruction_id: str, segment_id: str, label: str):
     except Exception as e:
         return {"status": "error", "message": str(e)}
     finally:
-        db.close()
+        TaskSession.remove()
 